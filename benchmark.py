@@ -0,0 +1,245 @@
+from generate_fixture import default_entries, default_seed, generate_fixture
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+# runs initialize.py, finalize.py, and editor.py's search and save routes against synthetic wiktextract data (see generate_fixture.py), times each of them, and checks that their output hasn't changed
+# everything happens in benchmark_dir, so nothing in this directory is overwritten
+# the first run with a given number of entries saves digests of every output file and editor page as the golden file for that size, and later runs are compared against it, so a change that's meant to make things faster can be checked for changes in output at the same time
+# after changing the output on purpose, delete the golden file so that it's saved again
+
+benchmark_dir = "benchmark"
+fixture_seed = default_seed
+
+# the output files compared against the golden file
+output_filenames = ["headwords.json", "statuses.txt", "alt_graph.json", "bonus_multiword.txt", "bonus_hyphenated.txt", "bonus_twowords.txt", "bonus_redlinks.txt", "bonus_orphans.txt", "wordlist.txt", "wordlist_2-15.txt", "wordlist_defs.txt", "wordlist_status.txt"]
+
+# the editor pages to time, each of which is loaded editor_repeats times and timed by the fastest
+# the editor's cache of search results is cleared before each of these, so that they time the searches themselves, and loading another page of a cached search is timed separately
+editor_searches = [
+    ("default", "/edit?family=on&n=100&offset=0"),
+    ("sort by length", "/edit?family=on&n=100&offset=0&sortbylength=on"),
+    ("later page", "/edit?family=on&n=100&offset=1000"),
+    ("after headword", "/edit?family=on&n=100&after=M"),
+    ("everything", "/edit?unsure=on&accepted=on&rejected=on&n=1000&offset=0"),
+    ("length", "/edit?minlength=4&maxlength=6&n=100&offset=0"),
+    ("senses", "/edit?minsenses=3&n=100&offset=0"),
+    ("color", "/edit?color=green&n=100&offset=0"),
+    ("selfref", "/edit?selfref=on&n=100&offset=0"),
+    ("pos", "/edit?pos=verb&n=100&offset=0"),
+    ("tag", "/edit?tag=uncountable&n=100&offset=0"),
+    ("wordregex", "/edit?wordregex=^ST.*ING$&n=100&offset=0"),
+    ("formregex", "/edit?formregex=[A-Z]&n=100&offset=0"),
+    ("defregex", "/edit?defregex=Alternative form of&n=100&offset=0"),
+    ("save to file", "/edit?n=100&offset=0&savetofile=on"),
+    ("word", "/edit?word=a"),
+    ("stats", "/stats")
+]
+editor_repeats = 3
+
+# the save benchmark accepts every sense of this many pending headwords at once, like a reviewer saving a batch, then loads the next batch
+save_batch_size = 100
+
+repo_dir = os.path.dirname(os.path.abspath(__file__))
+
+def get_digest(data):
+    return hashlib.md5(data).hexdigest()
+
+# runs one of the other scripts with the given answers to its prompts, returning how long it took
+def run_script(script, answers):
+    log_filename = script.replace(".py", ".log")
+    log_out = open(log_filename, "w", encoding="UTF-8")
+
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, os.path.join(repo_dir, script)], input="".join(f"{answer}\n" for answer in answers), stdout=log_out, stderr=subprocess.STDOUT, text=True)
+    elapsed = time.perf_counter() - start
+
+    log_out.close()
+
+    if process.returncode != 0:
+        print(f"{script} failed; see {os.path.join(benchmark_dir, log_filename)}.")
+        sys.exit(1)
+
+    return round(elapsed, 3)
+
+# the forms of each sense are listed in whatever order python's set happens to put them, which changes between runs
+def normalize_page(data):
+    return re.sub(rb'forms="([^"]*)"', lambda match: b'forms="' + b",".join(sorted(match.group(1).split(b","))) + b'"', data)
+
+def time_request(request, cached=False):
+    times = []
+
+    for _ in range(editor_repeats):
+        if not cached:
+            editor.clear_result_cache()
+
+        start = time.perf_counter()
+        response = request()
+        times.append(time.perf_counter() - start)
+
+    if response.status_code not in [200, 302]:
+        print(f"WARNING: got status {response.status_code}")
+
+    return response, round(min(times), 4)
+
+n_entries = input(f"Enter number of synthetic entries to benchmark with (leave blank for default {default_entries}): ")
+n_entries = int(n_entries) if n_entries != "" else default_entries
+
+os.makedirs(benchmark_dir, exist_ok=True)
+os.chdir(benchmark_dir)
+
+fixture_filename = f"synthetic_{n_entries}_{fixture_seed}.jsonl"
+golden_filename = f"golden_{n_entries}_{fixture_seed}.json"
+results_filename = f"results_{n_entries}_{fixture_seed}.json"
+
+if os.path.exists(fixture_filename):
+    print(f"Using existing {fixture_filename}.")
+else:
+    print(f"Generating {fixture_filename}...")
+
+    generate_fixture(fixture_filename, n_entries, fixture_seed)
+
+    print("Done.")
+
+# entries cached by a previous run would make parsing look much faster than it really is
+if os.path.exists(fixture_filename + ".cache"):
+    os.remove(fixture_filename + ".cache")
+
+results = {"entries": n_entries, "seed": fixture_seed, "fixture": get_digest(open(fixture_filename, "rb").read())}
+digests = {"fixture": results["fixture"], "files": {}, "editor": {}}
+
+print("Running initialize.py...")
+
+results["initialize"] = {"wall seconds": run_script("initialize.py", [fixture_filename, "y"])}
+results["initialize"]["phases"] = json.loads(open("phases.json", "r", encoding="UTF-8").read())["phases"]
+
+print("Done.")
+print("Running finalize.py...")
+
+results["finalize"] = {"wall seconds": run_script("finalize.py", ["wordlist", ""])}
+
+print("Done.")
+
+for filename in output_filenames:
+    if os.path.exists(filename):
+        digests["files"][filename] = get_digest(open(filename, "rb").read())
+
+print("Loading editor.py...")
+
+start = time.perf_counter()
+import editor
+results["editor"] = {"load seconds": round(time.perf_counter() - start, 3), "searches": {}}
+
+# the regex searches are timed with the trigram indexes, which are built in the background
+if editor.use_regex_index:
+    start = time.perf_counter()
+    editor.regex_index_thread.join()
+    results["editor"]["regex index wait seconds"] = round(time.perf_counter() - start, 3)
+
+client = editor.app.test_client()
+
+print("Done.")
+print("Timing editor searches...")
+
+for name, url in editor_searches:
+    response, elapsed = time_request(lambda: client.get(url))
+    results["editor"]["searches"][name] = elapsed
+    digests["editor"][name] = get_digest(normalize_page(response.data))
+
+# the first page of a search is loaded first, so that a later page only has to be sliced from its cached results
+# (the default search for pending headwords is answered from the editor's pending queue instead, so it isn't cached)
+client.get("/edit?unsure=on&accepted=on&rejected=on&n=100&offset=0")
+response, elapsed = time_request(lambda: client.get("/edit?unsure=on&accepted=on&rejected=on&n=100&offset=1000"), cached=True)
+results["editor"]["cached page seconds"] = elapsed
+
+print("Done.")
+print("Timing editor save...")
+
+pending_headwords = sorted(headword for headword in editor.headwords if editor.overall_status[headword] == ".")[:save_batch_size]
+form = {f"{headword} {sense["md5"]}": "+" for headword in pending_headwords for sense in editor.headwords[headword]}
+
+start = time.perf_counter()
+response = client.post(editor_searches[0][1], data=form)
+results["editor"]["save seconds"] = round(time.perf_counter() - start, 4)
+
+response, elapsed = time_request(lambda: client.get(editor_searches[0][1]))
+results["editor"]["next batch seconds"] = elapsed
+digests["editor"]["next batch"] = get_digest(normalize_page(response.data))
+digests["files"]["statuses.txt after save"] = get_digest(open("statuses.txt", "rb").read())
+
+print("Done.")
+
+if not os.path.exists(golden_filename):
+    golden_out = open(golden_filename, "w", encoding="UTF-8")
+    golden_out.write(json.dumps(digests, indent=4) + "\n")
+    golden_out.close()
+
+    print(f"Saved output digests to {golden_filename}; later runs will be compared against it.")
+else:
+    golden = json.loads(open(golden_filename, "r", encoding="UTF-8").read())
+    mismatches = []
+
+    if golden["fixture"] != digests["fixture"]:
+        print(f"WARNING: {fixture_filename} has changed since {golden_filename} was saved (probably because generate_fixture.py has changed), so differences in output are expected. Delete both to start over.")
+
+    for key in ["files", "editor"]:
+        for name in sorted(set(golden[key]) | set(digests[key])):
+            if golden[key].get(name) != digests[key].get(name):
+                mismatches.append(name)
+
+    results["golden mismatches"] = mismatches
+
+    if mismatches:
+        print(f"MISMATCH: output differs from {golden_filename} for {", ".join(mismatches)}.")
+    else:
+        print(f"Output matches {golden_filename}.")
+
+# the previous run's timings are shown alongside this run's for comparison
+previous_results = None
+
+if os.path.exists(results_filename):
+    previous_results = json.loads(open(results_filename, "r", encoding="UTF-8").read())
+
+def show_time(label, seconds, previous_seconds):
+    print(f"{label}: {seconds:.3f} s" + (f" (previously {previous_seconds:.3f} s)" if previous_seconds is not None else ""))
+
+def get_previous(*keys):
+    value = previous_results
+
+    for key in keys:
+        if value is None:
+            return None
+
+        value = value.get(key) if type(value) is dict else None
+
+    return value
+
+show_time("initialize.py", results["initialize"]["wall seconds"], get_previous("initialize", "wall seconds"))
+
+previous_phases = {phase["name"]: phase["wall seconds"] for phase in get_previous("initialize", "phases") or []}
+
+for phase in results["initialize"]["phases"]:
+    show_time(f"    {phase["name"]} ({phase["count"]} items, {phase["peak rss mb"]} MB peak)", phase["wall seconds"], previous_phases.get(phase["name"]))
+
+show_time("finalize.py", results["finalize"]["wall seconds"], get_previous("finalize", "wall seconds"))
+show_time("editor.py load", results["editor"]["load seconds"], get_previous("editor", "load seconds"))
+
+if "regex index wait seconds" in results["editor"]:
+    show_time("    waiting for regex indexes", results["editor"]["regex index wait seconds"], get_previous("editor", "regex index wait seconds"))
+
+for name in results["editor"]["searches"]:
+    show_time(f"    {name}", results["editor"]["searches"][name], get_previous("editor", "searches", name))
+
+show_time("    cached page", results["editor"]["cached page seconds"], get_previous("editor", "cached page seconds"))
+show_time("    save", results["editor"]["save seconds"], get_previous("editor", "save seconds"))
+show_time("    next batch", results["editor"]["next batch seconds"], get_previous("editor", "next batch seconds"))
+
+results_out = open(results_filename, "w", encoding="UTF-8")
+results_out.write(json.dumps(results, indent=4) + "\n")
+results_out.close()
+
+print(f"Outputted timings to {os.path.join(benchmark_dir, results_filename)}.")
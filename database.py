@@ -0,0 +1,144 @@
+import json
+import os
+from sense import Sense, intern_tags
+import sqlite3
+import sys
+
+# optional sqlite version of headwords.json and statuses.txt, written by initialize.py if output_database is set there
+# editor.py and finalize.py only use this if use_database is set below, in which case editor.py saves statuses to it as well as appending them to statuses.txt, so that nothing is lost by switching back
+# it can also be queried directly, e.g. sqlite3 headwords.db "SELECT headword, def FROM senses JOIN statuses USING (md5) WHERE status = '?'"
+database_filename = "headwords.db"
+
+# set this to True to have editor.py and finalize.py read headwords.db instead of headwords.json
+use_database = False
+
+schema = """
+CREATE TABLE headwords (headword TEXT PRIMARY KEY, length INTEGER NOT NULL, senses INTEGER NOT NULL);
+CREATE TABLE senses (md5 TEXT PRIMARY KEY, headword TEXT NOT NULL, position INTEGER NOT NULL, word TEXT NOT NULL, pos TEXT NOT NULL, gloss TEXT NOT NULL, def TEXT NOT NULL, forms TEXT NOT NULL, tags TEXT NOT NULL, alt TEXT, alt_inflections TEXT, normalized_forms TEXT NOT NULL);
+CREATE TABLE sense_tags (md5 TEXT NOT NULL, tag TEXT NOT NULL);
+CREATE TABLE statuses (md5 TEXT PRIMARY KEY, status TEXT NOT NULL);
+CREATE TABLE settings (key TEXT PRIMARY KEY, value);
+CREATE INDEX headwords_length ON headwords (length);
+CREATE INDEX senses_headword ON senses (headword, position);
+CREATE INDEX senses_pos ON senses (pos);
+CREATE INDEX sense_tags_tag ON sense_tags (tag);
+CREATE INDEX statuses_status ON statuses (status);
+"""
+
+def database_available():
+    if not use_database:
+        return False
+
+    if not os.path.exists(database_filename):
+        print(f"WARNING: use_database is set, but {database_filename} doesn't exist, so headwords.json will be used instead. Set output_database in initialize.py and run it again to create it.")
+        return False
+
+    if os.path.exists("headwords.json") and os.path.getmtime(database_filename) < os.path.getmtime("headwords.json"):
+        print(f"WARNING: use_database is set, but {database_filename} is older than headwords.json, so headwords.json will be used instead. Set output_database in initialize.py and run it again to update it.")
+        return False
+
+    return True
+
+def open_database():
+    return sqlite3.connect(database_filename)
+
+# written to a temporary file first, so that an interrupted run doesn't leave a half-written database behind
+def write_database(headwords):
+    temp_filename = database_filename + ".tmp"
+
+    if os.path.exists(temp_filename):
+        os.remove(temp_filename)
+
+    connection = sqlite3.connect(temp_filename)
+    connection.executescript(schema)
+
+    with connection:
+        connection.executemany("INSERT INTO headwords VALUES (?, ?, ?)", ((headword, len(headword), len(senses)) for headword, senses in headwords.items()))
+        connection.executemany("INSERT INTO senses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", ((sense["md5"], headword, position, sense["word"], sense["pos"], sense["gloss"], sense["def"], json.dumps(sense["forms"]), json.dumps(sense["tags"]), sense.get("alt"), json.dumps(sense["alt inflections"]) if "alt inflections" in sense else None, json.dumps(sense["normalized forms"])) for headword, senses in headwords.items() for position, sense in enumerate(senses)))
+        connection.executemany("INSERT INTO sense_tags VALUES (?, ?)", ((sense["md5"], tag) for senses in headwords.values() for sense in senses for tag in dict.fromkeys(sense["tags"])))
+
+    connection.close()
+    os.replace(temp_filename, database_filename)
+
+# many senses have the same lists of forms or tags as others (especially other senses of the same headword), so each distinct list is only decoded once, as a tuple like Sense.from_json stores them
+def decode_list(text, decoded_lists):
+    if text not in decoded_lists:
+        decoded_lists[text] = tuple(json.loads(text))
+
+    return decoded_lists[text]
+
+# returns the same dict of headwords as reading headwords.json, in the same order
+# the senses are written in order of headword and position, so reading them in the order they're stored avoids sorting them
+def read_headwords(connection):
+    headwords = {}
+    decoded_lists = {}
+    decoded_tags = {}
+
+    for headword, in connection.execute("SELECT headword FROM headwords ORDER BY rowid"):
+        headwords[headword] = []
+
+    for headword, md5, word, pos, gloss, definition, forms, tags, alt, alt_inflections, normalized_forms in connection.execute("SELECT headword, md5, word, pos, gloss, def, forms, tags, alt, alt_inflections, normalized_forms FROM senses ORDER BY rowid"):
+        sense = Sense()
+        sense.word = sys.intern(word)
+        sense.gloss = gloss
+        sense.pos = sys.intern(pos)
+        sense.forms = decode_list(forms, decoded_lists)
+
+        if tags not in decoded_tags:
+            decoded_tags[tags] = intern_tags(json.loads(tags))
+
+        sense.tags = decoded_tags[tags]
+
+        if alt is not None:
+            sense.alt = alt
+
+        if alt_inflections is not None:
+            sense.alt_inflections = decode_list(alt_inflections, decoded_lists)
+
+        sense.normalized_forms = decode_list(normalized_forms, decoded_lists)
+        sense.definition = definition
+        sense.md5 = md5
+
+        headwords[headword].append(sense)
+
+    return headwords
+
+# brings the database up to date with any lines added to statuses.txt since it was last read (e.g. statuses from a previous version pasted onto the end of it)
+# if statuses.txt has been replaced by a shorter file, the whole thing is read again
+def import_statuses(connection):
+    if not os.path.exists("statuses.txt"):
+        return 0
+
+    row = connection.execute("SELECT value FROM settings WHERE key = 'statuses.txt offset'").fetchone()
+    offset = row[0] if row is not None else 0
+
+    statuses_file = open("statuses.txt", "rb")
+
+    if os.path.getsize("statuses.txt") < offset:
+        offset = 0
+
+    statuses_file.seek(offset)
+    data = statuses_file.read()
+    statuses_file.close()
+
+    offset += len(data)
+    # splitlines handles files with windows line endings (e.g. edited by hand), like reading the file in text mode does
+    changes = [tuple(line.decode("UTF-8").split(" ")) for line in data.splitlines() if len(line) == 34]
+
+    with connection:
+        connection.executemany("INSERT OR REPLACE INTO statuses VALUES (?, ?)", changes)
+        connection.execute("INSERT OR REPLACE INTO settings VALUES ('statuses.txt offset', ?)", (offset,))
+
+    return len(changes)
+
+# every status that has been set, including "." for senses that have been reset to pending
+def read_statuses(connection):
+    return dict(connection.execute("SELECT md5, status FROM statuses"))
+
+# saves a list of (md5, status) in a single transaction, so that either all of them are saved or none of them are
+# the lines for them have just been appended to statuses.txt, taking it from old_size to new_size, so the offset read by import_statuses is moved past them in the same transaction
+# if the offset wasn't at old_size (i.e. other lines have been added since it was last read), it's left where it is, so that those lines are still read next time
+def save_statuses(connection, changes, old_size, new_size):
+    with connection:
+        connection.executemany("INSERT OR REPLACE INTO statuses VALUES (?, ?)", changes)
+        connection.execute("UPDATE settings SET value = ? WHERE key = 'statuses.txt offset' AND value = ?", (new_size, old_size))
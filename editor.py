@@ -1,16 +1,58 @@
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from database import database_available, import_statuses, open_database, read_headwords, read_statuses, save_statuses
 from flask import Flask, render_template, request, redirect, send_file, url_for
+from functools import lru_cache
 import hashlib
 import io
 import json
+import multiprocessing
+from normalize import normalize
+import os
 import re
-from unidecode import unidecode
+from regex_index import build_index, find_candidates
+from sense import Sense
+import signal
+from sorted_list import SortedList
+import threading
+import time
 
 max_n = 1000
+
+# the regex searches are narrowed down using trigram indexes of the headwords, original spellings, and definitions (see regex_index.py)
+# these take a while to build, so they're built in the background after starting up, and searches check everything until they're ready
+# they also use quite a bit of memory, so set this to False to always check everything instead
+use_regex_index = True
+
+# regex searches are checked in a separate worker process, which stops a search that takes longer than this many seconds (e.g. because of catastrophic backtracking), so that one bad regex can't freeze the editor
+# the results found before then are still shown, along with a message saying the search was stopped
+regex_time_limit = 10
+
+# the number of headwords sent to the worker at a time
+regex_batch_size = 1000
+
+# the number of extra workers started along with the worker, each of which takes over if the one before it stops working (e.g. if it's killed, or gets stuck somewhere it can't be stopped)
+regex_spare_workers = 2
+
+# the number of compiled regexes kept, since the same search is usually repeated for each page of results
+regex_cache_size = 256
+
+# the sorted results of recent searches are kept so that other pages of the same search load without searching again, up to this many headwords in total across all of them (about 8 bytes each), after which the least recently used ones are dropped
+result_cache_size = 2000000
+
 uploaded_wordlists = {}
 
-print("Reading headwords.json...")
+use_database = database_available()
+
+if use_database:
+    print("Reading headwords.db...")
 
-headwords = json.loads(open("headwords.json", "r", encoding="UTF-8").read())
+    connection = open_database()
+    headwords = read_headwords(connection)
+else:
+    print("Reading headwords.json...")
+
+    headwords = json.loads(open("headwords.json", "r", encoding="UTF-8").read(), object_hook=Sense.from_json)
 
 min_headword_length = min([len(headword) for headword in headwords])
 max_headword_length = max([len(headword) for headword in headwords])
@@ -27,26 +69,258 @@ for headword in headwords:
         pos.add(sense["pos"])
 
 print("Done.")
-print("Reading statuses.txt...")
 
-statuses_text = open("statuses.txt", "r").read().split("\n")
-statuses = {}
+if use_database:
+    print("Reading statuses from headwords.db...")
+
+    # statuses.txt is still checked for new lines, e.g. in case statuses from an old version have been added to it (the lines saved by the editor itself are skipped, since saving them also moves the offset past them)
+    print(f"{import_statuses(connection)} new lines read from statuses.txt.")
+
+    statuses = {md5: status for md5, status in read_statuses(connection).items() if status != "."}
+    connection.close()
+else:
+    print("Reading statuses.txt...")
+
+    statuses_text = open("statuses.txt", "r").read().split("\n")
+    statuses = {}
+
+    for line in statuses_text:
+        if len(line) == 34:
+            (md5, status) = line.split(" ")
+
+            if status != ".":
+                statuses[md5] = status
+            elif md5 in statuses:
+                del statuses[md5]
+
+print("Done.")
+print("Indexing headwords...")
+
+# colors that definitions are highlighted in, as described on the homepage
+def get_colors(sense):
+    colors = set()
+    def_lower = sense["def"].lower()
+
+    if "alt" in sense:
+        colors.add("green")
+
+    if "misspelling" in def_lower or "misconstruction" in def_lower or "eggcorn" in def_lower or "obsolete typography" in def_lower:
+        colors.add("yellow")
 
-for line in statuses_text:
-    if len(line) == 34:
-        (md5, status) = line.split(" ")
+    if "abbreviation" in def_lower or "acronym" in def_lower or "initialism" in def_lower:
+        colors.add("blue")
 
-        if status != ".":
-            statuses[md5] = status
-        elif md5 in statuses:
-            del statuses[md5]
+    if sense["pos"] == "name":
+        colors.add("purple")
+
+    if "TRANSLINGUAL" in sense["tags"]:
+        colors.add("pink")
+
+    if "AUTOGEN" in sense["tags"]:
+        colors.add("gray")
+
+    if "derogatory" in sense["tags"] or "offensive" in sense["tags"] or "slur" in sense["tags"]:
+        colors.add("red")
+
+    return colors
+
+family_unfriendly_tags = ["vulgar", "derogatory", "offensive", "slur"]
+
+# each of these maps a part of speech, tag, color, or overall status to the set of headwords with it (for the first three, in at least one sense), so that searches only have to check the headwords that could possibly match
+pos_index = {}
+tag_index = {}
+color_index = {}
+status_index = {status: set() for status in ".?+-"}
+
+# saving changes updates status_index (and the pending queues below) while other requests may be searching them, so both hold this while they use them
+status_lock = threading.Lock()
+
+# held while appending to statuses.txt (and saving the same changes to the database), so that the sizes before and after each save's lines are its own
+statuses_file_lock = threading.Lock()
+
+# headwords with at least one sense with a tag in family_unfriendly_tags, which are left out of searches with the "family friendly" option
+family_unfriendly = set()
+
+for headword in headwords:
+    for sense in headwords[headword]:
+        pos_index.setdefault(sense["pos"], set()).add(headword)
+
+        for tag in sense["tags"]:
+            tag_index.setdefault(tag, set()).add(headword)
+
+            if tag in family_unfriendly_tags:
+                family_unfriendly.add(headword)
+
+        for color in get_colors(sense):
+            color_index.setdefault(color, set()).add(headword)
+
+# every headword sorted by length and by number of senses, so that the headwords within a range of either are a single slice
+headwords_by_length = sorted(headwords, key=len)
+headwords_by_senses = sorted(headwords, key=lambda x: len(headwords[x]))
 
 print("Done.")
+
+@lru_cache(maxsize=regex_cache_size)
+def compile_regex(pattern):
+    return re.compile(pattern)
+
+# returns whether a headword matches every one of a list of (search parameter, regex) pairs
+def matches_regexes(headword, regexes):
+    for param, pattern in regexes:
+        regex = compile_regex(pattern)
+
+        if param == "wordregex" and regex.search(headword) is None:
+            return False
+
+        if param == "formregex" and not any(regex.search(sense["word"]) is not None for sense in headwords[headword]):
+            return False
+
+        if param == "defregex" and not any(regex.search(sense["def"]) is not None for sense in headwords[headword]):
+            return False
+
+    return True
+
+class RegexTimeout(Exception):
+    pass
+
+def stop_regex_search(signum, frame):
+    raise RegexTimeout()
+
+# the regex engine checks for signals while matching, so even a regex that would backtrack forever can be stopped with a timer
+# each batch is sent with the search's deadline, and the worker sends back the matches and the number of headwords it checked before then
+def run_regex_worker(connection):
+    signal.signal(signal.SIGALRM, stop_regex_search)
+
+    while True:
+        batch, regexes, deadline = connection.recv()
+        matches = []
+        checked = 0
+
+        try:
+            signal.setitimer(signal.ITIMER_REAL, max(deadline - time.time(), 0.001))
+
+            for headword in batch:
+                if matches_regexes(headword, regexes):
+                    matches.append(headword)
+
+                checked += 1
+
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        except RegexTimeout:
+            pass
+
+        connection.send((matches, checked))
+
+# the workers are forked from this process, so that they already have all of the headwords without having to read them again
+# fork isn't available on windows, so there the regexes are checked by the editor itself, without a time limit
+regex_context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+regex_lock = threading.Lock()
+
+def start_regex_worker():
+    connection, worker_connection = regex_context.Pipe()
+    worker = regex_context.Process(target=run_regex_worker, args=(worker_connection,), daemon=True)
+    worker.start()
+
+    return worker, connection
+
+# (process, connection) for the worker in use, followed by its spares
+# these are all started here, before starting any threads, since forking a process with threads running can cause problems, so no more are started after this
+regex_workers = []
+
+if regex_context is not None:
+    regex_workers = [start_regex_worker() for _ in range(1 + regex_spare_workers)]
+
+# returns the candidates which match every regex, the number of candidates checked, and a message saying why the search was stopped (or "" if it wasn't)
+# the candidates are checked in order, so if the search is stopped, the matches found so far are the first ones
+def search_regexes(candidates, regexes):
+    if regex_context is None:
+        return [headword for headword in candidates if matches_regexes(headword, regexes)], len(candidates), ""
+
+    matches = []
+    checked = 0
+
+    with regex_lock:
+        deadline = time.time() + regex_time_limit
+
+        for i in range(0, len(candidates), regex_batch_size):
+            batch = candidates[i:i+regex_batch_size]
+            result = None
+
+            # the worker stops itself at the deadline, so it only fails to answer a second later if it's died or gotten stuck, in which case the next spare takes over and is given the same batch once more, with whatever is left of the time limit
+            for attempt in range(2):
+                if len(regex_workers) == 0:
+                    return matches, checked, "The regex search couldn't be finished because every worker process for checking regexes has stopped working (restart the editor to fix this)"
+
+                worker, connection = regex_workers[0]
+
+                try:
+                    connection.send((batch, regexes, deadline))
+
+                    if not connection.poll(max(deadline - time.time(), 0) + 1):
+                        raise TimeoutError()
+
+                    result = connection.recv()
+                    break
+                except (EOFError, OSError):
+                    worker.kill()
+                    regex_workers.pop(0)
+
+            if result is None:
+                return matches, checked, "The regex search was stopped because the worker processes checking it stopped working"
+
+            batch_matches, batch_checked = result
+            matches += batch_matches
+            checked += batch_checked
+
+            if batch_checked < len(batch):
+                return matches, checked, f"The regex search was stopped after {regex_time_limit} seconds"
+
+    return matches, checked, ""
+
+# the ids used by the trigram indexes are positions in this list
+headword_list = list(headwords)
+
+# maps the parameter for each regex search to its trigram index, once it's been built
+regex_indexes = {}
+
+def build_regex_indexes():
+    regex_indexes["wordregex"] = build_index([headword] for headword in headword_list)
+    regex_indexes["formregex"] = build_index({sense["word"] for sense in headwords[headword]} for headword in headword_list)
+    regex_indexes["defregex"] = build_index([sense["def"] for sense in headwords[headword]] for headword in headword_list)
+
+    print("Finished building trigram indexes for regex searches.")
+
+if use_regex_index:
+    print("Building trigram indexes for regex searches in the background...")
+
+    regex_index_thread = threading.Thread(target=build_regex_indexes, daemon=True)
+    regex_index_thread.start()
+
 print("Determining overall status for each headword...")
 
 overall_status = {}
 redundant_senses = {}
 
+# the number of times the set of headwords with each overall status has changed, which cached search results are checked against (see get_cached_results)
+status_versions = {status: 0 for status in ".?+-"}
+
+# the pending headwords in the order they're shown, keyed by (whether they're sorted by length, whether family-unfriendly headwords are left out), so that the default search for pending headwords can be answered a page at a time without searching
+# these are built once every headword's status has been determined, and kept up to date by update_status after that
+pending_queues = None
+
+def sort_by_length(headword):
+    return (len(headword), headword)
+
+def update_pending_queues(headword, pending):
+    for (sortbylength, family), queue in pending_queues.items():
+        if family and headword in family_unfriendly:
+            continue
+
+        if pending:
+            queue.add(headword)
+        else:
+            queue.remove(headword)
+
 def update_status(headword):
     redundant_senses[headword] = []
 
@@ -54,20 +328,15 @@ def update_status(headword):
 
     for sense in headwords[headword]:
         if sense["md5"] in statuses and statuses[sense["md5"]] == "+":
-            for form in [headword] + sense["forms"]:
-                inflected_headword = unidecode(form).upper()
-
-                if inflected_headword.isalpha():
-                    accepted_forms.add(inflected_headword)
+            accepted_forms.add(headword)
+            accepted_forms.update(sense["normalized forms"])
 
     for sense in headwords[headword]:
         if sense["md5"] not in statuses:
-            redundant = True
-
-            for form in [headword] + sense["forms"]:
-                inflected_headword = unidecode(form).upper()
+            redundant = headword in accepted_forms
 
-                if inflected_headword.isalpha() and inflected_headword not in accepted_forms:
+            for inflected_headword in sense["normalized forms"]:
+                if inflected_headword not in accepted_forms:
                     redundant = False
 
             if redundant:
@@ -87,12 +356,34 @@ def update_status(headword):
     # prioritize highlight pending senses first, then unsure, then return accepted if at least one sense is accepted
     for char in ".?+-":
         if char in status_list:
-            overall_status[headword] = char
+            with status_lock:
+                if overall_status.get(headword) != char:
+                    if pending_queues is not None and "." in [overall_status.get(headword), char]:
+                        update_pending_queues(headword, char == ".")
+
+                    if headword in overall_status:
+                        status_index[overall_status[headword]].discard(headword)
+                        status_versions[overall_status[headword]] += 1
+
+                    overall_status[headword] = char
+                    status_index[char].add(headword)
+                    status_versions[char] += 1
+
             break
 
 for headword in headwords:
     update_status(headword)
 
+family_friendly_pending = [headword for headword in status_index["."] if headword not in family_unfriendly]
+pending_queues = {
+    (False, False): SortedList(status_index["."]),
+    (True, False): SortedList(status_index["."], key=sort_by_length),
+    (False, True): SortedList(family_friendly_pending),
+    (True, True): SortedList(family_friendly_pending, key=sort_by_length)
+}
+
+del family_friendly_pending
+
 print("Done.")
 print("Loading Flask app...")
 
@@ -111,7 +402,7 @@ def home():
             wordlist = set()
 
             for line in raw_wordlist.split("\\r\\n"):
-                word = unidecode(line.split(" ")[0]).upper()
+                word = normalize(line.split(" ")[0])
 
                 if len(word) >= 0 and word.isupper() and word not in wordlist:
                     wordlist.add(word)
@@ -141,11 +432,7 @@ def list_all_selfref_words(headword):
     inflections.add(headword)
 
     for sense in headwords[headword]:
-        for form in sense["forms"]:
-            form_unidecoded = unidecode(form).upper()
-
-            if form_unidecoded.isalpha():
-                inflections.add(form_unidecoded)
+        inflections.update(sense["normalized forms"])
 
     return inflections
 
@@ -159,6 +446,17 @@ def has_self_reference(definition, inflections):
 
     return False
 
+# returns an indexed filter (see edit) for the headwords which could match a regex, according to the given trigram index, or None if it can't be narrowed down
+def get_regex_filter(index, pattern):
+    candidates = find_candidates(index, pattern)
+
+    if candidates is None:
+        return None
+
+    candidate_headwords = {headword_list[i] for i in candidates}
+
+    return (len(candidate_headwords), lambda: candidate_headwords, lambda x: x in candidate_headwords)
+
 def get_status(headword, sense):
     if sense["md5"] in statuses:
         return statuses[sense["md5"]]
@@ -167,212 +465,257 @@ def get_status(headword, sense):
     else:
         return "."
 
+# maps each search's parameters (other than the ones choosing which part of the results to show) to (status versions, sorted matches, regex message), in order of when they were last used
+# only the overall statuses a search includes can change its results, so its results are only searched for again once one of those has changed, e.g. accepting a pending headword doesn't affect searches for rejected headwords
+result_cache = OrderedDict()
+result_cache_lock = threading.Lock()
+result_cache_headwords = 0
+
+# searches including every status don't depend on status at all
+def get_status_versions(included_statuses):
+    if len(included_statuses) == len(status_versions):
+        return ()
+
+    return tuple(status_versions[status] for status in included_statuses)
+
+def get_cached_results(query, versions):
+    with result_cache_lock:
+        if query not in result_cache or result_cache[query][0] != versions:
+            return None
+
+        result_cache.move_to_end(query)
+
+        return result_cache[query][1:]
+
+def cache_results(query, versions, sorted_matches, regex_msg):
+    global result_cache_headwords
+
+    if len(sorted_matches) > result_cache_size:
+        return
+
+    with result_cache_lock:
+        if query in result_cache:
+            result_cache_headwords -= len(result_cache.pop(query)[1])
+
+        result_cache[query] = (versions, sorted_matches, regex_msg)
+        result_cache_headwords += len(sorted_matches)
+
+        while result_cache_headwords > result_cache_size:
+            result_cache_headwords -= len(result_cache.popitem(last=False)[1][1])
+
+def clear_result_cache():
+    global result_cache_headwords
+
+    with result_cache_lock:
+        result_cache.clear()
+        result_cache_headwords = 0
+
 @app.route("/edit", methods=["GET", "POST"])
 def edit():
     if request.method == "GET":
         msg = ""
+        regex_msg = ""
 
         words = []
         words_data = {}
 
         if "word" in request.args:
-            word = unidecode(request.args.get("word")).upper()
+            word = normalize(request.args.get("word"))
 
             if word in headwords:
-                words = [unidecode(word).upper()]
+                words = [word]
             else:
                 msg = "No results found."
 
             n = 0
             offset = 0
             total_matches = 0
+            previous_args_str = ""
+            next_args_str = ""
         else:
-            matches = []
-
-            for headword in headwords:
-                match = True
-
-                if match and "wordlist" in request.args:
-                    md5 = request.args.get("wordlist")
-
-                    if md5 in uploaded_wordlists:
-                        wordlist = uploaded_wordlists[md5]
-
-                        if headword not in wordlist:
-                            match = False
-                    else:
-                        msg = "Could not find uploaded wordlist. Try reuploading it."
-
-                if match and "minlength" in request.args:
-                    minlength = int(request.args.get("minlength"))
-
-                    if len(headword) < minlength:
-                        match = False
-
-                if match and "maxlength" in request.args:
-                    maxlength = int(request.args.get("maxlength"))
-
-                    if len(headword) > maxlength:
-                        match = False
-
-                if match and "minsenses" in request.args:
-                    minsenses = int(request.args.get("minsenses"))
-
-                    if len(headwords[headword]) < minsenses:
-                        match = False
-
-                if match and "maxsenses" in request.args:
-                    maxsenses = int(request.args.get("maxsenses"))
+            # the parameters choosing which part of the results to show don't change the results themselves
+            query = tuple(sorted((k, v) for k, v in request.args.items() if k not in ["n", "offset", "after", "savetofile"]))
 
-                    if len(headwords[headword]) > maxsenses:
-                        match = False
-
-                if match and "color" in request.args:
-                    color = request.args["color"]
-                    color_found = False
-
-                    for sense in headwords[headword]:
-                        def_lower = sense["def"].lower()
+            if "sortbylength" in request.args:
+                sort_key = sort_by_length
+            else:
+                sort_key = None
 
-                        if color == "green" and "alt" in sense:
-                            color_found = True
+            # pending headwords are always included, and the others only if asked for
+            included_statuses = "." + "".join(status for status, param in [("?", "unsure"), ("+", "accepted"), ("-", "rejected")] if param in request.args)
 
-                        if color == "yellow" and ("misspelling" in def_lower or "misconstruction" in def_lower or "eggcorn" in def_lower or "obsolete typography" in def_lower):
-                            color_found = True
+            versions = get_status_versions(included_statuses)
+            cached_results = get_cached_results(query, versions)
 
-                        if color == "blue" and ("abbreviation" in def_lower or "acronym" in def_lower or "initialism" in def_lower):
-                            color_found = True
+            # the default search for pending headwords (with or without the family friendly option) is just the pending queue
+            if all(k in ["family", "sortbylength"] for k, v in query):
+                sorted_matches = pending_queues[("sortbylength" in request.args, "family" in request.args)]
+            elif cached_results is not None:
+                sorted_matches, regex_msg = cached_results
+            else:
+                matches = []
 
-                        if color == "purple" and sense["pos"] == "name":
-                            color_found = True
+                # invalid regexes are reported instead of searching for anything
+                regexes = [(param, request.args.get(param)) for param in ["wordregex", "formregex", "defregex"] if param in request.args]
+                invalid_regex = False
 
-                        if color == "pink" and "TRANSLINGUAL" in sense["tags"]:
-                            color_found = True
+                for param, pattern in regexes:
+                    try:
+                        compile_regex(pattern)
+                    except re.error as error:
+                        msg = f"Invalid regex \"{pattern}\": {error}."
+                        invalid_regex = True
 
-                        if color in ["gray", "grey"] and "AUTOGEN" in sense["tags"]:
-                            color_found = True
+                # the filters which can be answered using the indexes, as (number of headwords it allows, function returning the set of those headwords, function checking a single headword)
+                # the smallest of these gives the set of candidates, which is then narrowed down by the others in order of size, so that as few headwords as possible are checked
+                indexed_filters = []
 
-                        if color == "red" and ("derogatory" in sense["tags"] or "offensive" in sense["tags"] or "slur" in sense["tags"]):
-                            color_found = True
+                if "wordlist" in request.args:
+                    md5 = request.args.get("wordlist")
 
-                    if not color_found:
-                        match = False
+                    if md5 in uploaded_wordlists:
+                        wordlist = uploaded_wordlists[md5]
+                        indexed_filters.append((len(wordlist), lambda: {word for word in wordlist if word in headwords}, lambda x: x in wordlist))
+                    else:
+                        msg = "Could not find uploaded wordlist. Try reuploading it."
 
-                if match and "selfref" in request.args:
-                    inflections = list_all_selfref_words(headword)
-                    selfref_found = False
+                if "minlength" in request.args or "maxlength" in request.args:
+                    minlength = int(request.args.get("minlength", min_headword_length))
+                    maxlength = int(request.args.get("maxlength", max_headword_length))
+                    length_start = bisect_left(headwords_by_length, minlength, key=len)
+                    length_end = bisect_right(headwords_by_length, maxlength, key=len)
 
-                    for sense in headwords[headword]:
-                        if has_self_reference(unidecode(sense["gloss"]).upper(), inflections):
-                            selfref_found = True
-                            break
+                    indexed_filters.append((max(length_end - length_start, 0), lambda: headwords_by_length[length_start:length_end], lambda x: minlength <= len(x) <= maxlength))
 
-                    if not selfref_found:
-                        match = False
+                if "minsenses" in request.args or "maxsenses" in request.args:
+                    minsenses = int(request.args.get("minsenses", min_senses))
+                    maxsenses = int(request.args.get("maxsenses", max_senses))
+                    senses_start = bisect_left(headwords_by_senses, minsenses, key=lambda x: len(headwords[x]))
+                    senses_end = bisect_right(headwords_by_senses, maxsenses, key=lambda x: len(headwords[x]))
 
-                if match and "pos" in request.args:
-                    pos = request.args.get("pos")
-                    pos_found = False
+                    indexed_filters.append((max(senses_end - senses_start, 0), lambda: headwords_by_senses[senses_start:senses_end], lambda x: minsenses <= len(headwords[x]) <= maxsenses))
 
-                    for sense in headwords[headword]:
-                        if sense["pos"] == pos:
-                            pos_found = True
-                            break
+                if "color" in request.args:
+                    color_headwords = color_index.get("gray" if request.args["color"] == "grey" else request.args["color"], set())
+                    indexed_filters.append((len(color_headwords), lambda: color_headwords, lambda x: x in color_headwords))
 
-                    if not pos_found:
-                        match = False
+                if "pos" in request.args:
+                    pos_headwords = pos_index.get(request.args.get("pos"), set())
+                    indexed_filters.append((len(pos_headwords), lambda: pos_headwords, lambda x: x in pos_headwords))
 
-                if match and "tag" in request.args:
-                    tag = request.args.get("tag")
-                    tag_found = False
+                if "tag" in request.args:
+                    tag_headwords = tag_index.get(request.args.get("tag"), set())
+                    indexed_filters.append((len(tag_headwords), lambda: tag_headwords, lambda x: x in tag_headwords))
 
-                    for sense in headwords[headword]:
-                        if tag in sense["tags"]:
-                            tag_found = True
-                            break
+                if "family" in request.args:
+                    indexed_filters.append((len(headwords) - len(family_unfriendly), lambda: [headword for headword in headwords if headword not in family_unfriendly], lambda x: x not in family_unfriendly))
 
-                    if not tag_found:
-                        match = False
+                # the regexes themselves are checked for each candidate below, but the trigram indexes rule out most of the headwords they can't match
+                for param, pattern in regexes:
+                    if param in regex_indexes and not invalid_regex:
+                        regex_filter = get_regex_filter(regex_indexes[param], pattern)
 
-                if match and "wordregex" in request.args:
-                    wordregex = request.args.get("wordregex")
+                        if regex_filter is not None:
+                            indexed_filters.append(regex_filter)
 
-                    if not bool(re.search(wordregex, headword)):
-                        match = False
+                if len(included_statuses) < len(status_index):
+                    indexed_filters.append((sum(len(status_index[status]) for status in included_statuses), lambda: [headword for status in included_statuses for headword in status_index[status]], lambda x: overall_status[x] in included_statuses))
 
-                if match and "formregex" in request.args:
-                    defregex = request.args.get("formregex")
-                    regex_match_found = False
+                indexed_filters.sort(key=lambda x: x[0])
 
-                    for sense in headwords[headword]:
-                        if bool(re.search(defregex, sense["word"])):
-                            regex_match_found = True
-                            break
+                # the candidates are collected into a new list while holding status_lock, so that nothing changes status_index while it's being read
+                with status_lock:
+                    if invalid_regex:
+                        candidates = []
+                    elif len(indexed_filters) > 0:
+                        candidates = list(indexed_filters[0][1]())
 
-                    if not regex_match_found:
-                        match = False
+                        for size, get_headwords, check in indexed_filters[1:]:
+                            candidates = [headword for headword in candidates if check(headword)]
+                    else:
+                        candidates = headwords
 
-                if match and "defregex" in request.args:
-                    defregex = request.args.get("defregex")
-                    regex_match_found = False
+                # the self-reference filter has to be checked for each candidate
+                for headword in candidates:
+                    match = True
 
-                    for sense in headwords[headword]:
-                        if bool(re.search(defregex, sense["def"])):
-                            regex_match_found = True
-                            break
+                    if match and "selfref" in request.args:
+                        inflections = list_all_selfref_words(headword)
+                        selfref_found = False
 
-                    if not regex_match_found:
-                        match = False
+                        for sense in headwords[headword]:
+                            if has_self_reference(normalize(sense["gloss"]), inflections):
+                                selfref_found = True
+                                break
 
-                if match and "family" in request.args:
-                    tag_found = False
+                        if not selfref_found:
+                            match = False
 
-                    for sense in headwords[headword]:
-                        tag_found = False
+                    if match:
+                        matches.append(headword)
 
-                        for tag in sense["tags"]:
-                            if tag in ["vulgar", "derogatory", "offensive", "slur"]:
-                                tag_found = True
-                                break
+                # the regexes are checked last, in the order the results are shown
+                regex_stopped = ""
 
-                        if tag_found:
-                            break
+                if len(regexes) > 0 and len(matches) > 0:
+                    regex_candidates = len(matches)
+                    matches, regex_checked, regex_stopped = search_regexes(sorted(matches, key=sort_key), regexes)
 
-                    if tag_found:
-                        match = False
+                    if regex_stopped != "":
+                        regex_msg = f"{regex_stopped}, so only {regex_checked:,} of {regex_candidates:,} candidate headwords were checked. These are the results found before then."
+                    else:
+                        regex_msg = f"Checked {regex_checked:,} candidate headwords against the regex search."
 
-                if match and overall_status[headword] != "." and (("unsure" not in request.args and overall_status[headword] == "?") or ("accepted" not in request.args and overall_status[headword] == "+") or ("rejected" not in request.args and overall_status[headword] == "-")):
-                    match = False
+                sorted_matches = sorted(matches, key=sort_key)
 
-                if match:
-                    matches.append(headword)
+                # results cut short by the regex time limit, or that came with an error, might be different next time
+                if msg == "" and regex_stopped == "":
+                    cache_results(query, versions, sorted_matches, regex_msg)
 
             if "n" in request.args:
                 n = int(request.args.get("n"))
             else:
                 n = max_n
 
-            if "offset" in request.args:
-                offset = max(int(request.args.get("offset")), 0)
-            else:
-                offset = 0
+            # the links to the other pages start after a given headword too (other than the first page), so that saving changes to pending headwords doesn't make the next page skip over any that are still pending
+            previous_args = {k: v for k, v in request.args.items() if k not in ["offset", "after"]}
+            next_args = dict(previous_args)
+
+            # the pending queues are changed in place when changes are saved, so they're only read while holding status_lock (the cached results never change, so this doesn't matter for them)
+            with status_lock:
+                # the page can either start after a given headword, so that it carries on from where the last one left off even if the results have changed since then, or at a given position in the results
+                if "after" in request.args:
+                    after = request.args.get("after")
+                    offset = bisect_right(sorted_matches, after if sort_key is None else sort_key(after), key=sort_key)
+                elif "offset" in request.args:
+                    offset = max(int(request.args.get("offset")), 0)
+                else:
+                    offset = 0
 
-            if "sortbylength" in request.args:
-                sorted_matches = sorted(matches, key=lambda x: (len(x), x))
-            else:
-                sorted_matches = sorted(matches)
+                if "savetofile" in request.args:
+                    output_text = "\n".join(sorted_matches).encode("UTF-8")
+                    output_filename = f"{hashlib.md5(output_text).hexdigest()}.txt"
+                    output_data = io.BytesIO()
+                    output_data.write(bytes(output_text))
+                    output_data.seek(0)
+
+                    return send_file(output_data, download_name=output_filename, as_attachment=True)
+
+                total_matches = len(sorted_matches)
+                words = sorted_matches[offset:offset+n]
 
-            if "savetofile" in request.args:
-                output_text = "\n".join(sorted_matches).encode("UTF-8")
-                output_filename = f"{hashlib.md5(output_text).hexdigest()}.txt"
-                output_data = io.BytesIO()
-                output_data.write(bytes(output_text))
-                output_data.seek(0)
+                previous_offset = min(offset - n, total_matches)
+
+                if previous_offset > 0:
+                    previous_args["after"] = sorted_matches[previous_offset-1]
+                else:
+                    previous_args["offset"] = 0
 
-                return send_file(output_data, download_name=output_filename, as_attachment=True)
+            if len(words) > 0:
+                next_args["after"] = words[-1]
 
-            total_matches = len(matches)
-            words = sorted_matches[offset:offset+n]
+            previous_args_str = "?" + "&".join([f"{k}={v}" for k, v in previous_args.items()])
+            next_args_str = "?" + "&".join([f"{k}={v}" for k, v in next_args.items()])
 
             if total_matches == 0 and msg == "":
                 msg = "No results found."
@@ -382,17 +725,16 @@ def edit():
             inflections = list_all_selfref_words(headword)
 
             # sort by whether it has self-reference, then by number of inflections, then by number of capital letters
-            senses_sorted = sorted(headwords[headword], key=lambda x: (has_self_reference(unidecode(x["gloss"]).upper(), inflections), -len(list(set([unidecode(form).upper() for form in x["forms"] if unidecode(form).upper().isalpha()]))), sum(1 for c in x["word"] if c.isupper())))
+            senses_sorted = sorted(headwords[headword], key=lambda x: (has_self_reference(normalize(x["gloss"]), inflections), -len(x["normalized forms"]), sum(1 for c in x["word"] if c.isupper())))
 
             words_data[headword] = senses_sorted
 
         args_str = "?" + "&".join([f"{k}={v}" for k, v in request.args.items()])
 
-        return render_template("edit.html", msg=msg, min=min, max=max, n=n, offset=offset, total_matches=total_matches, args_str=args_str, words=words_data, redundant_senses=redundant_senses, get_status=get_status, list_forms=lambda x: ",".join(set([unidecode(x["word"]).upper()] + [unidecode(i).upper() for i in x["forms"] if unidecode(i).upper().isalpha()])))
+        return render_template("edit.html", msg=msg, regex_msg=regex_msg, min=min, max=max, n=n, offset=offset, total_matches=total_matches, args_str=args_str, previous_args_str=previous_args_str, next_args_str=next_args_str, words=words_data, redundant_senses=redundant_senses, get_status=get_status, list_forms=lambda x: ",".join(set([normalize(x["word"]), *x["normalized forms"]])))
 
     if request.method == "POST":
-        statuses_out = open("statuses.txt", "a")
-
+        changes = []
         words_to_update = set()
 
         for k, v in request.form.items():
@@ -406,9 +748,22 @@ def edit():
                     del statuses[md5]
 
                 words_to_update.add(word)
+                changes.append((md5, status))
+
+        # statuses.txt is always appended to, even when using the database, so that it has every status if use_database is turned off again
+        with statuses_file_lock:
+            old_size = os.path.getsize("statuses.txt") if os.path.exists("statuses.txt") else 0
+            statuses_out = open("statuses.txt", "a")
+
+            for md5, status in changes:
                 statuses_out.write(f"{md5} {status}\n")
 
-        statuses_out.close()
+            statuses_out.close()
+
+            if use_database:
+                connection = open_database()
+                save_statuses(connection, changes, old_size, os.path.getsize("statuses.txt"))
+                connection.close()
 
         for headword in words_to_update:
             update_status(headword)
@@ -1,6 +1,8 @@
+from database import database_available, import_statuses, open_database, read_headwords, read_statuses
 import json
+from normalize import normalize
 import re
-from unidecode import unidecode
+from sense import Sense
 
 wordlist_name = input("Enter wordlist title (leave blank for default \'wordlist\'): ")
 old_wordlist_filename = input("OPTIONAL: enter full filename of old wordlist for comparison (leave blank to skip): ")
@@ -8,20 +10,34 @@ old_wordlist_filename = input("OPTIONAL: enter full filename of old wordlist for
 if wordlist_name == '':
     wordlist_name = "wordlist"
 
-print("Reading headwords.json...")
+if database_available():
+    print("Reading headwords.db...")
 
-headwords = json.loads(open("headwords.json", "r", encoding="UTF-8").read())
+    connection = open_database()
+    headwords = read_headwords(connection)
 
-print("Done.")
-print("Reading statuses.txt...")
+    print("Done.")
+    print("Reading statuses from headwords.db...")
+
+    print(f"{import_statuses(connection)} new lines read from statuses.txt.")
+
+    statuses = read_statuses(connection)
+    connection.close()
+else:
+    print("Reading headwords.json...")
+
+    headwords = json.loads(open("headwords.json", "r", encoding="UTF-8").read(), object_hook=Sense.from_json)
+
+    print("Done.")
+    print("Reading statuses.txt...")
 
-statuses_text = open("statuses.txt", "r").read().split("\n")
-statuses = {}
+    statuses_text = open("statuses.txt", "r").read().split("\n")
+    statuses = {}
 
-for line in statuses_text:
-    if len(line) == 34:
-        (md5, status) = line.split(" ")
-        statuses[md5] = status
+    for line in statuses_text:
+        if len(line) == 34:
+            (md5, status) = line.split(" ")
+            statuses[md5] = status
 
 print("Done.")
 print(f"Generating {wordlist_name}...")
@@ -48,13 +64,13 @@ for headword in headwords:
             add_def(headword, sense["def"])
 
             for form in sense["forms"]:
-                form_upper = unidecode(form).upper()
+                form_upper = normalize(form)
 
                 if form_upper != headword and form_upper.isalpha():
                     add_def(form_upper, f"{headword}: {re.sub(r"\[(.*?) .*?\]$", "[\\1]", sense["def"])}")
 
             if "alt" in sense:
-                alt_headword = unidecode(sense["alt"]).upper()
+                alt_headword = normalize(sense["alt"])
 
                 if alt_headword.isalpha():
                     add_alt(alt_headword, headword)
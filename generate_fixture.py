@@ -0,0 +1,304 @@
+from inflect import compiled_comparative_rules, compiled_plural_rules, compiled_verb_rules, inflect
+import json
+import random
+import time
+
+# generates a synthetic version of raw-wiktextract-data.jsonl, so that initialize.py, editor.py, and finalize.py can be tested and timed without downloading the real thing (see benchmark.py)
+# the words are made up, but the entries have the same shapes as real ones: alternative forms, misspellings, and abbreviations whose glosses match alt_patterns, separate entries for plurals and verb forms, forms with tags, uncountable nouns, not-comparable adjectives, Translingual entries, multiword and hyphenated terms, links to other entries (some of which don't exist), and plenty of entries in other languages
+# the same number of entries and seed always give exactly the same file
+
+default_filename = "synthetic-wiktextract-data.jsonl"
+default_entries = 100000
+default_seed = 0
+
+# (language, code, weight); in the real data, only about a tenth of the lines are for English or Translingual entries
+languages = [("English", "en", 10), ("Translingual", "mul", 1), ("French", "fr", 12), ("German", "de", 10), ("Spanish", "es", 10), ("Italian", "it", 10), ("Latin", "la", 12), ("Finnish", "fi", 8), ("Russian", "ru", 9), ("Japanese", "ja", 8), ("Old English", "ang", 3), ("Middle English", "enm", 3), ("Scots", "sco", 2), ("Dutch", "nl", 2)]
+
+# (kind of English entry, weight)
+english_kinds = [("noun", 32), ("verb", 12), ("adj", 12), ("adv", 4), ("name", 7), ("intj", 1), ("alt", 12), ("abbreviation", 3), ("phrase", 7), ("hyphenated", 3), ("plural", 4), ("verb form", 3)]
+
+onsets = ["", "", "b", "bl", "br", "c", "ch", "cl", "cr", "d", "dr", "f", "fl", "fr", "g", "gl", "gr", "h", "j", "k", "l", "m", "n", "p", "ph", "pl", "pr", "qu", "r", "s", "sc", "sh", "sk", "sl", "sm", "sn", "sp", "st", "str", "sw", "t", "th", "tr", "v", "w", "wh", "y", "z"]
+nuclei = ["a", "a", "e", "e", "i", "i", "o", "o", "u", "ai", "au", "ea", "ee", "ie", "oa", "oi", "oo", "ou", "y"]
+codas = ["", "", "", "b", "ck", "d", "ff", "g", "l", "ll", "m", "n", "nd", "ng", "nk", "nt", "p", "r", "rd", "rn", "rt", "s", "sh", "ss", "st", "t", "tch", "th", "x", "z"]
+endings = ["", "", "", "", "", "e", "y", "er", "le", "ly", "ness", "ism", "ist", "man", "ous", "ic", "al", "ment", "ity", "sis", "ish", "ful", "foot", "person"]
+accents = {"a": "à", "c": "ç", "e": "é", "i": "ï", "n": "ñ", "o": "ö", "u": "ü"}
+
+alt_phrases = ["Alternative form of", "Alternative spelling of", "Alternative letter-case form of", "Archaic form of", "Archaic spelling of", "Dated form of", "Eye dialect spelling of", "Misspelling of", "Nonstandard spelling of", "Obsolete form of", "Obsolete spelling of", "Pronunciation spelling of", "Rare spelling of", "Informal form of", "Clipping of", "Ellipsis of", "US spelling of", "British spelling of"]
+abbreviation_phrases = ["Abbreviation of", "Acronym of", "Initialism of"]
+sense_tags = ["countable", "uncountable", "transitive", "intransitive", "informal", "colloquial", "slang", "archaic", "obsolete", "rare", "dated", "US", "UK", "Australia", "figuratively", "humorous", "vulgar", "derogatory", "offensive", "slur", "ethnic", "also"]
+topics = ["botany", "zoology", "chemistry", "computing", "nautical", "music", "law", "medicine", "sports", "cooking", "mathematics", "geology", "heraldry"]
+defining_words = ["a", "an", "the", "of", "or", "and", "to", "in", "for", "with", "which", "that", "someone", "something", "person", "place", "kind", "type", "small", "large", "old", "used", "make", "having", "being", "act", "state", "quality", "part", "especially", "usually", "made", "from", "by", "one", "who", "water", "land", "animal", "plant", "tool", "sound"]
+
+def choose_weighted(rng, choices):
+    return rng.choices(choices, weights=[choice[-1] for choice in choices])[0]
+
+def make_word(rng):
+    word = "".join(rng.choice(onsets) + rng.choice(nuclei) + rng.choice(codas) for _ in range(rng.choice([1, 1, 2, 2, 2, 3]))) + rng.choice(endings)
+
+    if rng.random() < 0.03:
+        i = rng.randrange(len(word))
+
+        if word[i] in accents:
+            word = word[:i] + accents[word[i]] + word[i+1:]
+
+    return word
+
+def make_gloss(rng, english_words):
+    words = [rng.choice(defining_words) for _ in range(rng.randint(3, 12))]
+
+    # some glosses mention other words, including occasionally the word itself or "this"
+    if english_words and rng.random() < 0.3:
+        words.insert(rng.randrange(len(words)), rng.choice(english_words))
+
+    gloss = " ".join(words)
+    gloss = gloss[0].upper() + gloss[1:]
+
+    if rng.random() < 0.05:
+        gloss += " (countable)"
+
+    return gloss + rng.choice([".", ".", ""])
+
+def make_tags(rng):
+    tags = []
+
+    for _ in range(rng.choice([0, 0, 0, 1, 1, 2, 3])):
+        tag = rng.choice(sense_tags)
+
+        if tag not in tags:
+            tags.append(tag)
+
+    return tags
+
+def make_sense(rng, english_words, glosses=None, tags=None):
+    sense = {}
+
+    # glosses which are just a single word are treated as alternative forms of it
+    if glosses is None and english_words and rng.random() < 0.03:
+        glosses = [rng.choice(english_words).capitalize() + rng.choice([".", ""])]
+
+    if glosses is None:
+        glosses = [make_gloss(rng, english_words)]
+
+        # subsenses list the glosses of every level of the definition
+        if rng.random() < 0.15:
+            glosses.append(make_gloss(rng, english_words))
+
+    sense["glosses"] = glosses
+    sense["tags"] = make_tags(rng) if tags is None else tags
+
+    if not sense["tags"]:
+        del sense["tags"]
+
+    if rng.random() < 0.1:
+        topic = rng.choice(topics)
+        sense["raw_glosses"] = [f"({topic}) {glosses[-1]}"]
+        sense["topics"] = [topic]
+
+    if rng.random() < 0.04:
+        sense["qualifier"] = rng.choice(["chiefly; chiefly", "rare", "proscribed", "now rare"])
+
+    if english_words and rng.random() < 0.3:
+        sense["links"] = [[link, link + "#English"] for link in (rng.choice(english_words) if rng.random() < 0.8 else make_word(rng) for _ in range(rng.randint(1, 2)))]
+
+    if rng.random() < 0.2:
+        sense["examples"] = [{"text": make_gloss(rng, english_words), "type": "example"}]
+
+    return sense
+
+def make_linkages(rng, entry, english_words):
+    for linkage_key in ["synonyms", "derived", "related"]:
+        if rng.random() < 0.15:
+            entry[linkage_key] = [{"word": rng.choice(english_words) if english_words and rng.random() < 0.6 else make_word(rng)} for _ in range(rng.randint(1, 4))]
+
+# the inflect.py rules are used to make the inflected forms realistic
+def inflect_word(compiled, word):
+    return [form.lower() for form in inflect(compiled, word.upper(), word)]
+
+def make_english_entry(rng, english_words, kind):
+    # these are forms of existing words, so they need something to refer to
+    if kind in ["alt", "abbreviation", "plural", "verb form"] and len(english_words) < 10:
+        kind = "noun"
+
+    word = make_word(rng)
+    pos = kind
+    forms = []
+    senses = None
+
+    if kind == "noun":
+        if rng.random() < 0.15:
+            # only really uncountable if not also "usually" or "countable"
+            senses = [make_sense(rng, english_words, tags=rng.choice([["uncountable"], ["uncountable"], ["uncountable", "usually"], ["countable", "uncountable"]]))]
+
+            if "countable" in senses[0]["tags"] or "usually" in senses[0]["tags"]:
+                forms = [{"form": form, "tags": ["plural"]} for form in inflect_word(compiled_plural_rules, word)]
+        else:
+            forms = [{"form": form, "tags": ["plural"]} for form in inflect_word(compiled_plural_rules, word)]
+    elif kind == "verb":
+        third_person, present_participle, past = inflect_word(compiled_verb_rules, word)
+        forms = [{"form": third_person, "tags": ["present", "singular", "third-person"]}, {"form": present_participle, "tags": ["participle", "present"]}, {"form": past, "tags": ["past"]}, {"form": past, "tags": ["participle", "past"]}]
+
+        if rng.random() < 0.3:
+            forms.insert(0, {"form": word, "tags": ["infinitive"]})
+    elif kind == "adj":
+        if rng.random() < 0.4:
+            senses = [make_sense(rng, english_words, tags=["not-comparable"])]
+        elif rng.random() < 0.3:
+            forms = [{"form": f"more {word}", "tags": ["comparative"]}, {"form": f"most {word}", "tags": ["superlative"]}]
+        else:
+            comparative, superlative = inflect_word(compiled_comparative_rules, word)
+            forms = [{"form": comparative, "tags": ["comparative"]}, {"form": superlative, "tags": ["superlative"]}]
+    elif kind == "name":
+        word = word.capitalize()
+        senses = [make_sense(rng, english_words, glosses=[rng.choice(["A surname.", "A male given name.", "A female given name.", f"A town in {rng.choice(english_words or [word]).capitalize()}."])])]
+
+        if rng.random() < 0.3:
+            forms = [{"form": word + "s", "tags": ["plural"]}]
+    elif kind == "alt":
+        target = rng.choice(english_words)
+        phrase = rng.choice(alt_phrases)
+        pos = rng.choice(["noun", "noun", "verb", "adj", "adv"])
+
+        if phrase == "Alternative letter-case form of":
+            word = target.upper() if rng.random() < 0.5 else target.capitalize()
+        elif phrase in ["Clipping of", "Ellipsis of"]:
+            word = target[:max(2, len(target) // 2)]
+        else:
+            i = rng.randrange(len(target))
+            word = target[:i] + rng.choice("aeiouy") + target[i+1:]
+
+        senses = [make_sense(rng, english_words, glosses=[f"{phrase} {target}{rng.choice(["", ".", ": " + make_gloss(rng, english_words)])}"], tags=["alt-of"] + make_tags(rng))]
+        senses[0]["alt_of"] = [{"word": target}]
+    elif kind == "abbreviation":
+        parts = [rng.choice(english_words) for _ in range(rng.randint(2, 4))]
+        word = "".join(part[0] for part in parts).upper()
+        pos = "noun"
+        senses = [make_sense(rng, english_words, glosses=[f"{rng.choice(abbreviation_phrases)} {" ".join(parts)}{rng.choice(["", "."])}"], tags=["abbreviation", "alt-of"])]
+        senses[0]["alt_of"] = [{"word": " ".join(parts)}]
+    elif kind == "phrase":
+        word = " ".join(rng.choice(english_words) if english_words and rng.random() < 0.7 else make_word(rng) for _ in range(rng.randint(2, 3)))
+        pos = rng.choice(["phrase", "noun", "verb", "prep_phrase"])
+    elif kind == "hyphenated":
+        word = "-".join(rng.choice(english_words) if english_words and rng.random() < 0.7 else make_word(rng) for _ in range(2))
+        pos = rng.choice(["noun", "adj"])
+    elif kind == "plural":
+        target = rng.choice(english_words)
+        word = inflect_word(compiled_plural_rules, target)[0]
+        pos = "noun"
+        senses = [make_sense(rng, english_words, glosses=[f"plural of {target}"], tags=["form-of", "plural"])]
+        senses[0]["form_of"] = [{"word": target}]
+    elif kind == "verb form":
+        target = rng.choice(english_words)
+        third_person, present_participle, past = inflect_word(compiled_verb_rules, target)
+        word, phrase = rng.choice([(third_person, "third-person singular simple present indicative of"), (present_participle, "present participle and gerund of"), (past, "simple past and past participle of")])
+        pos = "verb"
+        senses = [make_sense(rng, english_words, glosses=[f"{phrase} {target}"], tags=["form-of"])]
+        senses[0]["form_of"] = [{"word": target}]
+
+    if rng.random() < 0.05:
+        forms.append({"form": make_word(rng), "tags": ["alternative"]})
+
+    if rng.random() < 0.02:
+        forms.append({"form": word[:2].upper(), "tags": ["abbreviation"]})
+
+    if senses is None:
+        senses = [make_sense(rng, english_words) for _ in range(rng.choice([1, 1, 1, 2, 2, 3, 4]))]
+
+    entry = {"word": word, "pos": pos, "lang": "English", "lang_code": "en"}
+
+    if forms:
+        entry["forms"] = forms
+
+    entry["senses"] = senses
+
+    make_linkages(rng, entry, english_words)
+
+    if rng.random() < 0.4:
+        entry["sounds"] = [{"ipa": f"/{word}/", "tags": ["Received-Pronunciation"]}]
+
+    if rng.random() < 0.3:
+        entry["etymology_text"] = f"From {rng.choice(["Middle English", "Old English", "Latin", "French"])} {make_word(rng)}."
+
+    if rng.random() < 0.2:
+        entry["translations"] = [{"lang": lang, "code": code, "word": make_word(rng)} for lang, code, weight in rng.sample(languages[2:], 3)]
+
+    # only base words are used as targets for other entries
+    if kind in ["noun", "verb", "adj", "adv"] and " " not in word:
+        english_words.append(word)
+
+    return entry
+
+def make_translingual_entry(rng, english_words):
+    kind = rng.choice(["taxon", "taxon", "symbol", "letter"])
+
+    if kind == "taxon":
+        entry = {"word": f"{make_word(rng).capitalize()} {make_word(rng)}", "pos": "name", "lang": "Translingual", "lang_code": "mul", "senses": [make_sense(rng, english_words, glosses=[f"A taxonomic species within the family {make_word(rng).capitalize()}idae."], tags=["taxonomic"])]}
+    elif kind == "symbol":
+        entry = {"word": make_word(rng)[:rng.randint(1, 3)].capitalize(), "pos": "symbol", "lang": "Translingual", "lang_code": "mul", "senses": [make_sense(rng, english_words, glosses=[f"Symbol for {rng.choice(english_words or ["something"])}."])]}
+    else:
+        entry = {"word": rng.choice("abcdefghijklmnopqrstuvwxyz"), "pos": "character", "lang": "Translingual", "lang_code": "mul", "senses": [make_sense(rng, english_words, glosses=["A letter of the Latin alphabet."])]}
+
+    return entry
+
+def make_foreign_entry(rng, english_words, lang, code):
+    word = make_word(rng)
+    entry = {"word": word, "pos": rng.choice(["noun", "noun", "verb", "adj", "adv", "name"]), "lang": lang, "lang_code": code, "senses": [make_sense(rng, english_words) for _ in range(rng.randint(1, 3))]}
+
+    if rng.random() < 0.5:
+        entry["forms"] = [{"form": make_word(rng), "tags": rng.choice([["plural"], ["genitive", "singular"], ["feminine"], ["past"]])} for _ in range(rng.randint(1, 6))]
+
+    # a few non-English entries mention English elsewhere on the line, which the byte prefilter in initialize.py can't rule out
+    if rng.random() < 0.05:
+        entry["descendants"] = [{"lang": "English", "lang_code": "en", "word": rng.choice(english_words or [word])}]
+
+    if rng.random() < 0.3:
+        entry["etymology_text"] = f"From {rng.choice(["Latin", "Proto-Germanic", "Old French", "Ancient Greek"])} *{make_word(rng)}."
+
+    return entry
+
+def generate_fixture(filename, n_entries, seed):
+    rng = random.Random(seed)
+    english_words = []
+    counts = {}
+
+    fixture_out = open(filename, "w", encoding="UTF-8")
+
+    last_message = time.time()
+    for i in range(n_entries):
+        lang, code, weight = choose_weighted(rng, languages)
+
+        if lang == "English":
+            kind, weight = choose_weighted(rng, english_kinds)
+            entry = make_english_entry(rng, english_words, kind)
+        elif lang == "Translingual":
+            entry = make_translingual_entry(rng, english_words)
+        else:
+            entry = make_foreign_entry(rng, english_words, lang, code)
+
+        counts[lang] = counts.get(lang, 0) + 1
+
+        fixture_out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        if time.time() - last_message >= 10:
+            last_message = time.time()
+            print("Generating %s... (%d of %d entries)" % (filename, i + 1, n_entries))
+
+    fixture_out.close()
+
+    return counts
+
+if __name__ == "__main__":
+    filename = input(f"Enter filename for synthetic wiktextract data (leave blank for default '{default_filename}'): ")
+    n_entries = input(f"Enter number of entries (leave blank for default {default_entries}): ")
+    seed = input(f"Enter random seed (leave blank for default {default_seed}): ")
+
+    if filename == "":
+        filename = default_filename
+
+    n_entries = int(n_entries) if n_entries != "" else default_entries
+    seed = int(seed) if seed != "" else default_seed
+
+    print(f"Generating {filename}...")
+
+    counts = generate_fixture(filename, n_entries, seed)
+
+    print(f"Done. {counts.get("English", 0)} English and {counts.get("Translingual", 0)} Translingual entries out of {n_entries}.")
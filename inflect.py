@@ -0,0 +1,164 @@
+import json
+import re
+import time
+
+# the rules initialize.py uses to automatically add plurals, verb forms, and comparatives/superlatives for senses that don't list them
+# these only depend on the headword (and occasionally the original spelling or alt of the sense), so they can also be used without running initialize.py
+# running this file by itself times each set of rules on every headword in headwords.json
+
+# each rule is a dict with the following keys, all but "forms" being optional:
+# "suffixes": the headword must end with one of these (if it's at least "min_length" letters long)...
+# "words": ...or be one of these; if neither of these is given, the rule applies to every headword
+# "except": headwords the rule doesn't apply to
+# "except_suffixes": (suffix, minimum length) pairs; the rule doesn't apply to headwords at least that long which end with the suffix
+# "except_spellings": the rule doesn't apply if the original spelling of the sense ends with one of these
+# "alts": the rule only applies to senses which are alternative forms of one of these
+# "forms": (number of letters to remove from the end of the headword, letters to add) for each form, where "~" stands for the last letter of the headword
+# suffixes and words may contain character classes like [AEIOU] and [^AEIOU]
+# the first rule that applies to a headword is used, so each list ends with a rule that applies to everything
+
+plural_rules = [
+    {"suffixes": ["MAN"], "except": ["BIRMAN", "BRACHMAN", "BRAMAN", "DISCMAN", "FLEHMAN", "HESSEMAN", "IMMELMAN", "KERMAN", "KUMAN", "KUNSTLEROMAN", "KURMAN", "LYERMAN", "OSMAN", "OTHMAN", "ROMAN", "YALMAN", "YELMAN", "ZAMAN"], "forms": [(3, "MEN")]},
+    {"suffixes": ["FOOT"], "except": ["ICEFOOT", "SALTFOOT", "SOWFOOT", "SWIFTFOOT"], "forms": [(3, "EET")]},
+    {"suffixes": ["LOAF"], "forms": [(1, "VES")]},
+    {"suffixes": ["TOOTH"], "forms": [(4, "EETH")]},
+    {"suffixes": ["PERSON"], "forms": [(4, "OPLE")]},
+    {"suffixes": ["[^AEIOUY]Y"], "forms": [(1, "IES")]},
+    {"suffixes": ["SIS"], "forms": [(2, "ES")]},
+    {"suffixes": ["XIS"], "min_length": 6, "forms": [(2, "ES")]},
+    {"suffixes": ["J", "S", "X", "Z", "SH", "ZH", "NCH", "SCH", "TCH", "EACH", "EECH", "OACH", "OOCH", "OUCH"], "words": ["ARCH", "ARCSECH", "ARRACACH", "ARRACH", "ARSECH", "CESAREVICH", "KNOLYCH", "KNOWLECH", "KNOWLYCH", "MAIZESTARCH", "SANDWHICH", "SPINNACH", "TUCH", "WICH"], "except_suffixes": [("OUX", 3)], "forms": [(0, "ES")]},
+    {"forms": [(0, "S")]}
+]
+
+# third-person singular, present participle, past tense
+verb_rules = [
+    {"suffixes": ["[^AEIOUY]Y"], "forms": [(1, "IES"), (0, "ING"), (1, "IED")]},
+    {"suffixes": ["[^AEIO]E"], "except_spellings": ["é"], "forms": [(0, "S"), (1, "ING"), (0, "D")]},
+    {"suffixes": ["E"], "except_spellings": ["é"], "forms": [(0, "S"), (0, "ING"), (0, "D")]},
+    # final consonants are doubled after a single vowel, e.g. "STOP" to "STOPPING"
+    {"suffixes": ["[^AEIOU][AEIOU][BCDFGKLMNPRTV]", "[^AEIOUY]Y[BCDFGKLMNPRTV]"], "words": ["[AEIOUY][BCDFGKLMNPRTV]"], "except": ["COMISERAT", "DIAGNOSIS", "LYK", "MANET", "TACET"], "except_suffixes": [("EN", 2), ("ER", 4)], "forms": [(0, "S"), (0, "~ING"), (0, "~ED")]},
+    {"suffixes": ["[^AEIOU][AEIOU]S", "[^AEIOUY]YS"], "words": ["[AEIOUY]S"], "except": ["DIAGNOSIS"], "forms": [(0, "~ES"), (0, "~ING"), (0, "~ED")]},
+    {"suffixes": ["J", "X", "Z", "SH", "ZH", "NCH", "SCH", "TCH", "EACH", "EECH", "OACH", "OOCH", "OUCH"], "forms": [(0, "ES"), (0, "ING"), (0, "ED")]},
+    {"suffixes": ["S"], "forms": [(0, "ES"), (0, "ING"), (0, "ED")]},
+    {"forms": [(0, "S"), (0, "ING"), (0, "ED")]}
+]
+
+# comparative, superlative
+comparative_rules = [
+    {"alts": ["far"], "forms": [(0, "THER"), (0, "THEST")]},
+    {"suffixes": ["EY"], "except_suffixes": [("IEY", 3)], "forms": [(2, "IER"), (2, "IEST")]},
+    {"suffixes": ["[^AEIOUY]Y"], "forms": [(1, "IER"), (1, "IEST")]},
+    {"suffixes": ["E"], "except_spellings": ["é"], "forms": [(0, "R"), (0, "ST")]},
+    # final consonants are doubled after a single vowel, e.g. "BIG" to "BIGGER"
+    {"suffixes": ["[^AEIOU][AEIOU][BCDFGKLMNPRSTV]", "[^AEIOUY]Y[BCDFGKLMNPRSTV]"], "words": ["[AEIOUY][BCDFGKLMNPRSTV]", "BAAAD"], "except": ["BUCKSOM", "EEEVIL", "HOLESOM", "NICKEL", "NOBEL", "OL", "SUBTIL", "YALLAR"], "except_suffixes": [("AL", 4), ("AN", 4), ("EN", 4), ("ER", 4), ("IC", 4), ("ID", 4), ("IN", 4), ("ON", 4), ("AYN", 3), ("EAT", 3), ("LES", 3), ("LUT", 3), ("OUS", 3), ("ED", 5)], "forms": [(0, "~ER"), (0, "~EST")]},
+    {"forms": [(0, "ER"), (0, "EST")]}
+]
+
+letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# expands a pattern like "[^AEIOUY]Y" into every string of capital letters it matches
+def expand_pattern(pattern):
+    strings = [""]
+
+    for part in re.findall(r"\[\^?[A-Z]+\]|[A-Z]", pattern):
+        if part[:2] == "[^":
+            choices = [c for c in letters if c not in part[2:-1]]
+        elif part[0] == "[":
+            choices = part[1:-1]
+        else:
+            choices = part
+
+        strings = [s + c for s in strings for c in choices]
+
+    return strings
+
+# indexes a list of rules by the suffixes and words they apply to, so that only the rules which could apply to a headword have to be checked
+def compile_rules(rules):
+    compiled = {
+        "rules": rules,
+        "suffixes": {}, # suffix -> list of (rule index, minimum length)
+        "words": {}, # word -> list of rule indices
+        "always": [], # rule indices that apply to every headword (other than exceptions)
+        "except": [set(rule.get("except", [])) for rule in rules],
+        "except_suffixes": [[(suffix, min_length) for pattern, min_length in rule.get("except_suffixes", []) for suffix in expand_pattern(pattern)] for rule in rules]
+    }
+
+    for i, rule in enumerate(rules):
+        if "suffixes" not in rule and "words" not in rule:
+            compiled["always"].append(i)
+
+        for pattern in rule.get("suffixes", []):
+            for suffix in expand_pattern(pattern):
+                compiled["suffixes"].setdefault(suffix, []).append((i, rule.get("min_length", 0)))
+
+        for pattern in rule.get("words", []):
+            for word in expand_pattern(pattern):
+                compiled["words"].setdefault(word, []).append(i)
+
+    compiled["suffix_lengths"] = sorted(set(len(suffix) for suffix in compiled["suffixes"]))
+
+    return compiled
+
+compiled_plural_rules = compile_rules(plural_rules)
+compiled_verb_rules = compile_rules(verb_rules)
+compiled_comparative_rules = compile_rules(comparative_rules)
+
+# returns the forms of a headword given by the first applicable rule
+# word is the original spelling of the sense (e.g. "café" for "CAFE") and alt is what the sense is an alternative form of, if anything
+def inflect(compiled, headword, word="", alt=None):
+    candidates = set(compiled["always"])
+    candidates.update(compiled["words"].get(headword, []))
+
+    for length in compiled["suffix_lengths"]:
+        if length > len(headword):
+            break
+
+        for i, min_length in compiled["suffixes"].get(headword[-length:], []):
+            if len(headword) >= min_length:
+                candidates.add(i)
+
+    for i in sorted(candidates):
+        rule = compiled["rules"][i]
+
+        if headword in compiled["except"][i]:
+            continue
+
+        if any(len(headword) >= min_length and headword.endswith(suffix) for suffix, min_length in compiled["except_suffixes"][i]):
+            continue
+
+        if "except_spellings" in rule and word.endswith(tuple(rule["except_spellings"])):
+            continue
+
+        if "alts" in rule and alt not in rule["alts"]:
+            continue
+
+        return [headword[:len(headword)-removal] + addition.replace("~", headword[-1]) for removal, addition in rule["forms"]]
+
+# inflects a whole batch of (headword, word, alt) at once, returning a list of forms for each
+# each distinct headword/word/alt is only worked out once, since the same headword often has several senses that need the same inflections
+def inflect_all(compiled, batch):
+    results = {}
+    forms = []
+
+    for key in batch:
+        if key not in results:
+            results[key] = inflect(compiled, *key)
+
+        forms.append(results[key])
+
+    return forms
+
+if __name__ == "__main__":
+    print("Reading headwords.json...")
+
+    headwords = json.loads(open("headwords.json", "r", encoding="UTF-8").read())
+    batch = [(headword, sense["word"], sense.get("alt")) for headword in headwords for sense in headwords[headword]]
+
+    print(f"Done. Inflecting {len(batch)} senses of {len(headwords)} headwords...")
+
+    for name, compiled in [("plural", compiled_plural_rules), ("verb", compiled_verb_rules), ("comparative", compiled_comparative_rules)]:
+        start = time.perf_counter()
+        inflect_all(compiled, batch)
+        elapsed = time.perf_counter() - start
+
+        print(f"{name}: {elapsed:.3f} s ({len(batch) / elapsed:.0f} senses/s)")
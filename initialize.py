@@ -1,9 +1,28 @@
-from copy import copy, deepcopy
+import bz2
+from database import write_database
+from functools import lru_cache
+import gzip
 import hashlib
+from inflect import compiled_comparative_rules, compiled_plural_rules, compiled_verb_rules, inflect_all
+import inspect
+import io
 import json
+import lzma
+import multiprocessing
+import os
+import phases
+import pickle
+from queue import Queue
 import re
+import threading
 import time
-from unidecode import unidecode
+from normalize import normalize, normalize_forms
+from sense import Sense
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 print("WARNING: This script will overwrite headwords.json and statuses.txt!")
 
@@ -11,170 +30,173 @@ raw_filename = input("Enter filename for raw wiktextract data (leave blank for d
 
 run_bonus_scripts = input("Run bonus searches for potentially missing words? (type anything for yes, leave blank for no): ") != ""
 
-if raw_filename == '':
-    raw_filename = "raw-wiktextract-data.jsonl"
-
-raw = open(raw_filename, "r", encoding="UTF-8")
-print("Parsing %s..." % raw_filename)
-
-entries = []
-n = 0
-last_message = time.time()
-for line in raw:
-    entry = json.loads(line)
-
-    if "lang" in entry.keys() and entry["lang"] in ["English", "Translingual"]:
-        entries.append(entry)
-
-    n += 1
-    if time.time() - last_message >= 10:
-        last_message = time.time()
-        print("Parsing %s... (%d lines parsed)" % (raw_filename, n))
-
-print("Done. %d lines parsed." % n)
-
-if run_bonus_scripts:
-    print("BONUS: initiating bonus scripts...")
-
-    entry_words = {}
+# the time and memory taken by each phase are saved to this file at the end (see phases.py)
+# set phases.profile to also save a cProfile dump of each phase, and phases.trace_memory to also record the peak memory allocated by python during each phase (this is much slower)
+phase_report_filename = "phases.json"
+phases.profile = False
+phases.trace_memory = False
+
+# the raw data can also be read directly from a compressed file (as downloaded from kaikki.org), which is detected by its extension or its first few bytes
+compression_extensions = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".xz": "xz",
+    ".zst": "zstd"
+}
 
-    for entry in entries:
-        entry_word = entry["word"]
+compression_magic = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bz2",
+    b"\xfd7zXZ\x00": "xz",
+    b"\x28\xb5\x2f\xfd": "zstd"
+}
 
-        if entry_word not in entry_words:
-            entry_words[entry_word] = []
+if raw_filename == '':
+    raw_filename = "raw-wiktextract-data.jsonl"
 
-        entry_words[entry_word].append(entry)
+    if not os.path.exists(raw_filename):
+        for extension in compression_extensions:
+            if os.path.exists(raw_filename + extension):
+                raw_filename += extension
+                break
 
-    # multiword: generates a list of words that exist as part of multiword terms but don't have standalone entries
-    # for example, as of writing "EC" only appears as part of the phrase "home ec"
-    # not all of these actually warrant pages; in this case, it's clear that EC is a clipping of "economics", but DEJA and VU probably wouldn't
-    print("BONUS: finding words which are part of multiword terms but do not have standalone entries...")
+def get_compression(filename):
+    with open(filename, "rb") as f:
+        start = f.read(6)
 
-    multiword_out = open("bonus_multiword.txt", "w", encoding="UTF-8")
-    multiword_lines = []
+    for magic in compression_magic:
+        if start.startswith(magic):
+            return compression_magic[magic]
 
-    for entry_word in entry_words:
-        words = entry_word.split(" ")
+    return compression_extensions.get(os.path.splitext(filename)[1])
 
-        for single_word in words:
-            if single_word not in entry_words.keys() and unidecode(single_word).isalpha():
-                multiword_lines.append(f"{unidecode(single_word).upper()} (\"{single_word}\" from \"{entry_word}\")\n")
+def open_decompressed(filename, compression):
+    if compression == "gzip":
+        return gzip.open(filename, "rb")
+    elif compression == "bz2":
+        return bz2.open(filename, "rb")
+    elif compression == "xz":
+        return lzma.open(filename, "rb")
+    elif compression == "zstd":
+        if zstandard is None:
+            raise ImportError("Reading zstd-compressed data requires the zstandard package (pip install zstandard).")
 
-    for line in sorted(set(multiword_lines), key=lambda x: (len(x.split(" ")[0]), x)):
-        multiword_out.write(line)
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(filename, "rb"), closefd=True))
 
-    print("Outputted multiword-only words to bonus_multiword.txt.")
+raw_compression = get_compression(raw_filename)
 
-    # hyphenated: generates a list of words which have hyphens in them but where the non-?hyphenated form isn't on wiktionary
-    # again, make sure these are actually attested before adding to wiktionary
-    print("BONUS: finding entries which are hyphenated but do not have hyphenated forms...")
+# skips lines whose raw bytes can't possibly contain an English/Translingual "lang" field without decoding them first, since the vast majority of lines are for other languages
+# lines with escaped ascii characters (e.g. "Engl\u0069sh") are always fully decoded, so this never drops anything that would otherwise be kept
+prefilter_lines = True
+lang_prefilter = re.compile(rb'"lang"\s*:\s*"(?:English|Translingual)"|\\u00[4-7]')
 
-    hyphenated_out = open("bonus_hyphenated.txt", "w", encoding="UTF-8")
-    hyphenated_lines = []
+# the raw data is split into chunks of roughly this many bytes (aligned on newlines) which are parsed by a pool of worker processes, then merged back together in their original order
+# set parse_processes to 1 to parse everything in this process instead
+# worker processes are forked, so on platforms that don't support this (i.e. windows), parsing is always done in this process
+parse_processes = os.cpu_count() or 1
+parse_chunk_size = 2**25
 
-    for entry_word in entry_words:
-        no_hyphens = entry_word.replace("-", "")
+if "fork" not in multiprocessing.get_all_start_methods():
+    parse_processes = 1
 
-        if entry_word[0] != "-" and entry_word[-1] != "-" and no_hyphens not in entry_words.keys() and unidecode(no_hyphens).isalpha():
-            hyphenated_lines.append(f"{unidecode(no_hyphens).upper()} (\"{no_hyphens}\" from \"{entry_word}\")\n")
+# compressed data can't be split into byte ranges without decompressing it, so it's instead decompressed a chunk at a time in a separate thread from the one doing the parsing
+# the decompression thread waits whenever this many decompressed chunks haven't been fully parsed yet, so that the whole decompressed file never ends up in memory
+# this is raised to one more than parse_processes if that's higher, so that every worker process has a chunk to parse while the next one is being decompressed
+chunks_ahead = 4
 
-    for line in sorted(set(hyphenated_lines), key=lambda x: (len(x.split(" ")[0]), x)):
-        hyphenated_out.write(line)
+def read_decompressed_chunks(filename, compression):
+    with open_decompressed(filename, compression) as f:
+        while True:
+            data = f.read(parse_chunk_size) + f.readline()
 
-    print("Outputted hyphenated-only entries to bonus_hyphenated.txt.")
+            if data == b"":
+                break
 
-    # twowords: generates a list of entries consisting of two lowercase words alphabetical words, separated by a space, where the concatenation of those two words does not have an entry
-    print("BONUS: finding two-word-only entries...")
+            yield data
 
-    twowords_out = open("bonus_twowords.txt", "w", encoding="UTF-8")
-    twowords_lines = []
+def read_ahead(chunks, limit):
+    queue = Queue()
 
-    for entry_word in entry_words:
-        words = entry_word.split(" ")
-        no_spaces = entry_word.replace(" ", "")
+    def read():
+        try:
+            for chunk in chunks:
+                queue.put(chunk)
+                limit.acquire()
 
-        if len(words) == 2 and words[0].islower() and words[0].isalpha() and words[1].islower() and words[1].isalpha() and no_spaces not in entry_words.keys():
-            twowords_lines.append(f"{unidecode(no_spaces).upper()} (\"{no_spaces}\" from \"{entry_word}\")\n")
+            queue.put(None)
+        except BaseException as e:
+            queue.put(e)
 
-    for line in sorted(set(twowords_lines), key=lambda x: (len(x.split(" ")[0]), x)):
-        twowords_out.write(line)
+    threading.Thread(target=read, daemon=True).start()
 
-    print("Outputted two-word-only entries to bonus_twoword.txt.")
+    while True:
+        chunk = queue.get()
 
-    # redlinks: generates a list of redlinks found within the raw wiktextract data, e.g. alternate forms that are listed but don't have actual entries yet
-    print("BONUS: finding redlinks...")
+        if isinstance(chunk, BaseException):
+            raise chunk
+        elif chunk is None:
+            break
 
-    redlinks_out = open("bonus_redlinks.txt", "w", encoding="UTF-8")
-    redlinks_lines = []
+        yield chunk
 
-    # list of keys which could contain links to other entries
-    linkage_keys = ["synonyms", "antonyms", "hypernyms", "derived words", "holonyms", "meronyms", "derived", "related", "coordinate_terms"]
+def find_chunks(filename):
+    size = os.path.getsize(filename)
+    boundaries = [0]
 
-    for entry_word in entry_words:
-        for entry in entry_words[entry_word]:
-            for linkage_key in linkage_keys:
-                if linkage_key in entry.keys():
-                    for linkage in entry[linkage_key]:
-                        linked_entry = linkage["word"]
+    with open(filename, "rb") as f:
+        while boundaries[-1] < size:
+            f.seek(boundaries[-1] + parse_chunk_size)
+            f.readline()
+            boundaries.append(min(f.tell(), size))
 
-                        if linked_entry not in entry_words.keys() and unidecode(linked_entry).replace("-", "").isalpha():
-                            redlinks_lines.append(f"{unidecode(linked_entry).upper()} (\"{linked_entry}\" from \"{entry_word}\")\n")
+    return list(zip(boundaries[:-1], boundaries[1:]))
 
-            if "forms" in entry.keys():
-                for form in entry["forms"]:
-                    if "tags" in form and "alternative" in form["tags"]:
-                        linked_entry = form["form"]
+# list of keys which could contain links to other entries
+linkage_keys = ["synonyms", "antonyms", "hypernyms", "derived words", "holonyms", "meronyms", "derived", "related", "coordinate_terms"]
 
-                        if linked_entry not in entry_words.keys() and unidecode(linked_entry).replace("-", "").isalpha():
-                            redlinks_lines.append(f"{unidecode(linked_entry).upper()} (\"{linked_entry}\" from \"{entry_word}\")\n")
+# the bonus searches (see below) only need to know which entries exist once everything has been parsed, so everything else about them is worked out while parsing, alongside the rest of the extraction
+# returns (search, word that might be missing, line to output if it is) for each word the entry suggests might be missing
+def get_bonus_candidates(entry_word, links):
+    candidates = []
 
-            if "senses" in entry.keys():
-                for sense in entry["senses"]:
-                    if "links" in sense.keys():
-                        for link in sense["links"]:
-                            linked_entry = link[1].split("#")[0]
+    # multiword: words that exist as part of multiword terms but don't have standalone entries
+    if " " in entry_word:
+        for single_word in entry_word.split(" "):
+            if normalize(single_word).isalpha():
+                candidates.append(("multiword", single_word, f"{normalize(single_word)} (\"{single_word}\" from \"{entry_word}\")\n"))
 
-                            if linked_entry not in entry_words.keys() and unidecode(linked_entry).replace("-", "").isalpha():
-                                redlinks_lines.append(f"{unidecode(linked_entry).upper()} (\"{linked_entry}\" from \"{entry_word}\")\n")
+    # hyphenated: entries which have hyphens in them but whose non-hyphenated form isn't on wiktionary
+    if "-" in entry_word:
+        no_hyphens = entry_word.replace("-", "")
 
-    for line in sorted(set(redlinks_lines), key=lambda x: (len(x.split(" ")[0]), x)):
-        redlinks_out.write(line)
+        if entry_word[0] != "-" and entry_word[-1] != "-" and normalize(no_hyphens).isalpha():
+            candidates.append(("hyphenated", no_hyphens, f"{normalize(no_hyphens)} (\"{no_hyphens}\" from \"{entry_word}\")\n"))
 
-    print("Outputted redlinks to bonus_redlinks.txt.")
+    # twowords: entries consisting of two lowercase alphabetical words, separated by a space, whose concatenation doesn't have an entry
+    words = entry_word.split(" ")
 
-print("Extracting and organizing data from English/Translingual entries...")
+    if len(words) == 2 and words[0].islower() and words[0].isalpha() and words[1].islower() and words[1].isalpha():
+        no_spaces = entry_word.replace(" ", "")
+        candidates.append(("twowords", no_spaces, f"{normalize(no_spaces)} (\"{no_spaces}\" from \"{entry_word}\")\n"))
 
-headwords = {}
-headwords_out = open("headwords.json", "w", encoding="UTF-8")
-statuses_out = open("statuses.txt", "w", encoding="UTF-8")
+    # redlinks: linked entries which might not exist
+    for linked_entry in dict.fromkeys(links):
+        if normalize(linked_entry).replace("-", "").isalpha():
+            candidates.append(("redlinks", linked_entry, f"{normalize(linked_entry)} (\"{linked_entry}\" from \"{entry_word}\")\n"))
 
-pos_abbr = {
-    "contraction": "contr",
-    "intj": "interj",
-    "name": "n",
-    "noun": "n",
-    "num": "n",
-    "prep_phrase": "prep phrase",
-    "verb": "v"
-}
+    return candidates
 
-def get_pos_abbr(s):
-    if s in pos_abbr.keys():
-        return pos_abbr[s]
-    else:
-        return s
+# reduces an English/Translingual entry to only the data that's used later on, so that the rest of the entry (translations, etymology, examples, etc.) never has to be kept in memory
+# returns the original word, the headword (or None if the entry has no senses), the sense data for each gloss, and the candidates for the bonus searches if running them
+def extract_entry(entry):
+    headword = None
+    senses_data = []
+    bonus_candidates = None
 
-n = 0
-last_message = time.time()
-for entry in entries:
     if "senses" in entry.keys() and "pos" in entry.keys():
-        headword = unidecode(entry["word"]).upper()
+        headword = normalize(entry["word"])
 
         if len(headword) >= 1:
-            if headword not in headwords:
-                headwords[headword] = []
-
             for sense in entry["senses"]:
                 # subdefinitions actually include glosses for all levels of the definition so handling that is a bit awkward
                 if "glosses" in sense.keys():
@@ -184,7 +206,7 @@ for entry in entries:
 
                 if "\n" not in glosses[0]: # weird case where the list of derived/related terms is misinterpreted as a definition
                     for gloss in glosses:
-                        sense_data = {}
+                        sense_data = Sense()
                         sense_data["word"] = entry["word"] # retains original capitalization and/or diacritics
                         sense_data["gloss"] = gloss.replace("\n", " ")
                         sense_data["pos"] = entry["pos"]
@@ -231,23 +253,331 @@ for entry in entries:
                         # to prevent duplication of identical inflected forms (e.g. past and past participle for a verb)
                         sense_data["forms"] = list(dict.fromkeys(sense_data["forms"]))
 
-                        # to prevent duplication of higher-level definitions while still having one copy of them
-                        definition_already_exists = False
+                        senses_data.append(sense_data)
+        else:
+            headword = None
 
-                        sense_data_json = json.dumps(sense_data)
-                        for existing_sense in headwords[headword]:
-                            if json.dumps(existing_sense) == sense_data_json:
-                                definition_already_exists = True
+    if run_bonus_scripts:
+        links = []
 
-                        if not definition_already_exists:
-                            headwords[headword].append(sense_data)
+        for linkage_key in linkage_keys:
+            if linkage_key in entry.keys():
+                for linkage in entry[linkage_key]:
+                    links.append(linkage["word"])
+
+        if "forms" in entry.keys():
+            for form in entry["forms"]:
+                if "tags" in form and "alternative" in form["tags"]:
+                    links.append(form["form"])
+
+        if "senses" in entry.keys():
+            for sense in entry["senses"]:
+                if "links" in sense.keys():
+                    for link in sense["links"]:
+                        links.append(link[1].split("#")[0])
+
+        bonus_candidates = get_bonus_candidates(entry["word"], links)
+
+    return entry["word"] if run_bonus_scripts else None, headword, senses_data, bonus_candidates
+
+# returns the extracted data for English/Translingual entries within the given data, along with the number of lines parsed and skipped
+def parse_data(data):
+    lines = data.splitlines()
+
+    chunk_entries = []
+    chunk_skipped = 0
+
+    for line in lines:
+        if prefilter_lines and lang_prefilter.search(line) is None:
+            chunk_skipped += 1
+        else:
+            entry = json.loads(line)
+
+            if "lang" in entry.keys() and entry["lang"] in ["English", "Translingual"]:
+                chunk_entries.append(extract_entry(entry))
+
+    return chunk_entries, len(lines), chunk_skipped
+
+def parse_chunk(chunk):
+    start, end = chunk
+
+    with open(raw_filename, "rb") as f:
+        f.seek(start)
+        return parse_data(f.read(end - start))
+
+# the extracted data is cached alongside the raw data, so that rerunning this script after only changing the later steps (alt patterns, autogen inflections, excluded tags, etc.) doesn't require parsing everything again
+# the cache is only used if the raw data's size, modification time, and sampled contents, as well as everything that determines what's extracted from it (see get_extractor_fingerprint), are all unchanged
+use_parse_cache = True
+cache_filename = raw_filename + ".cache"
+
+# hashing the entire file would take nearly as long as parsing it, so only this many evenly spaced 1 MB blocks are hashed
+fingerprint_samples = 64
+
+# the functions that do the extracting, the settings they use, and the modules they call (normalize.py) or whose objects are pickled in the cache (sense.py)
+# the rest of this script is left out, so that changing the later steps doesn't make the cache out of date
+def get_extractor_fingerprint():
+    extractor_hash = hashlib.md5()
+
+    for function in [parse_data, extract_entry, get_bonus_candidates]:
+        extractor_hash.update(inspect.getsource(function).encode("UTF-8"))
+
+    extractor_hash.update(repr((prefilter_lines, lang_prefilter.pattern, linkage_keys)).encode("UTF-8"))
+
+    for filename in ["normalize.py", "sense.py"]:
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), filename), "rb") as f:
+            extractor_hash.update(f.read())
+
+    return extractor_hash.hexdigest()
+
+def get_fingerprint(filename):
+    size = os.path.getsize(filename)
+    content_hash = hashlib.md5()
+
+    with open(filename, "rb") as f:
+        for i in range(fingerprint_samples):
+            f.seek(size * i // fingerprint_samples)
+            content_hash.update(f.read(2**20))
+
+        f.seek(max(size - 2**20, 0))
+        content_hash.update(f.read(2**20))
+
+    return {
+        "size": size,
+        "mtime": os.path.getmtime(filename),
+        "hash": content_hash.hexdigest(),
+        "extractor": get_extractor_fingerprint(),
+        "bonus": run_bonus_scripts
+    }
+
+def read_cache(cache):
+    with cache:
+        while True:
+            try:
+                yield pickle.load(cache)
+            except EOFError:
+                break
+
+pool = None
+parsed_chunks = None
+decompression_limit = None
+cache_out = None
+
+phases.start_phase("parse")
+
+if use_parse_cache:
+    fingerprint = get_fingerprint(raw_filename)
+
+    if os.path.exists(cache_filename):
+        cache = gzip.open(cache_filename, "rb")
+        cached_fingerprint = pickle.load(cache)
+
+        # a cache that includes bonus data can still be used if the bonus searches are skipped, but not vice versa
+        if {**cached_fingerprint, "bonus": run_bonus_scripts} == fingerprint and (cached_fingerprint["bonus"] or not run_bonus_scripts):
+            print("Reading cached data for %s from %s..." % (raw_filename, cache_filename))
+            parsed_chunks = read_cache(cache)
+        else:
+            print("Cached data in %s is out of date and will be replaced." % cache_filename)
+            cache.close()
+
+if parsed_chunks is None:
+    print("Parsing %s and extracting data from English/Translingual entries..." % raw_filename)
+
+    if raw_compression is not None:
+        print("Decompressing %s data..." % raw_compression)
+
+        decompression_limit = threading.Semaphore(max(chunks_ahead, parse_processes + 1))
+        decompressed_chunks = read_ahead(read_decompressed_chunks(raw_filename, raw_compression), decompression_limit)
+
+        if parse_processes > 1:
+            pool = multiprocessing.get_context("fork").Pool(parse_processes)
+            parsed_chunks = pool.imap(parse_data, decompressed_chunks)
+        else:
+            parsed_chunks = map(parse_data, decompressed_chunks)
+    else:
+        chunks = find_chunks(raw_filename)
+
+        if parse_processes > 1 and len(chunks) > 1:
+            pool = multiprocessing.get_context("fork").Pool(min(parse_processes, len(chunks)))
+            parsed_chunks = pool.imap(parse_chunk, chunks)
+        else:
+            parsed_chunks = map(parse_chunk, chunks)
+
+    # written to a temporary file first so that an interrupted run doesn't leave behind an incomplete cache
+    if use_parse_cache:
+        cache_out = gzip.open(cache_filename + ".tmp", "wb", compresslevel=4)
+        pickle.dump(fingerprint, cache_out, pickle.HIGHEST_PROTOCOL)
+
+headwords = {}
+entry_words = set()
+bonus_candidates = []
+
+# the senses already added to each headword, for quickly checking whether a sense is a duplicate
+sense_keys = {}
+duplicates = 0
+
+n = 0
+skipped = 0
+n_entries = 0
+last_message = time.time()
+for parsed_chunk in parsed_chunks:
+    chunk_entries, chunk_lines, chunk_skipped = parsed_chunk
+
+    if cache_out is not None:
+        pickle.dump(parsed_chunk, cache_out, pickle.HIGHEST_PROTOCOL)
+
+    if decompression_limit is not None:
+        decompression_limit.release()
+
+    for entry_word, headword, senses_data, entry_bonus_candidates in chunk_entries:
+        if run_bonus_scripts:
+            entry_words.add(entry_word)
+            bonus_candidates += entry_bonus_candidates
+
+        if headword is not None:
+            if headword not in headwords:
+                headwords[headword] = []
+                sense_keys[headword] = set()
+
+            for sense_data in senses_data:
+                # to prevent duplication of higher-level definitions while still having one copy of them
+                sense_key = (sense_data["word"], sense_data["gloss"], sense_data["pos"], tuple(sense_data["forms"]), tuple(sense_data["tags"]))
+
+                if sense_key in sense_keys[headword]:
+                    duplicates += 1
+                else:
+                    sense_keys[headword].add(sense_key)
+                    headwords[headword].append(sense_data)
+
+    n += chunk_lines
+    skipped += chunk_skipped
+    n_entries += len(chunk_entries)
 
-    n += 1
     if time.time() - last_message >= 10:
         last_message = time.time()
-        print(f"Extracting and organizing data from English/Translingual entries... ({n}/{len(entries)} entries done)")
+        print("Parsing %s and extracting data from English/Translingual entries... (%d lines parsed, %d entries extracted)" % (raw_filename, n, n_entries))
+
+if pool is not None:
+    pool.close()
+    pool.join()
+
+if cache_out is not None:
+    cache_out.close()
+    os.replace(cache_filename + ".tmp", cache_filename)
+    print("Cached extracted data to %s." % cache_filename)
+
+print("Done. %d lines parsed (%d skipped without decoding), %d entries extracted (%d duplicate senses suppressed)." % (n, skipped, n_entries, duplicates))
+
+phases.end_phase(n_entries)
+
+del sense_keys
+
+# incremental rebuilds: rather than expanding, purging, and rendering every headword from scratch, only the headwords whose extracted senses have changed since the last run are reprocessed, along with the headwords that depend on them (alternative forms of them, and headwords their forms purge senses from)
+# everything else is taken from the previous headwords.json, and the sense md5s that were added, changed, or removed are listed in changes.json
+# this needs the manifest saved by the previous run (which is only saved if this is set), so the first run with this set is still a full rebuild, as is any run after this script or any of the modules it uses has been changed
+incremental_rebuild = False
+manifest_filename = "headwords.manifest"
+
+def get_code_fingerprint():
+    code_hash = hashlib.md5()
+
+    for filename in ["initialize.py", "inflect.py", "normalize.py", "sense.py"]:
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), filename), "rb") as f:
+            code_hash.update(f.read())
+
+    return code_hash.hexdigest()
+
+# (original word, inflected headword) for every form of every sense of a headword, which is all that purging inflections needs to know about it
+def get_inflection_pairs(headword):
+    return {(sense["word"], normalize(form)) for sense in headwords[headword] for form in sense["forms"]}
+
+manifest = None
+changed_headwords = None
+
+if incremental_rebuild:
+    code_fingerprint = get_code_fingerprint()
+    headword_fingerprints = {headword: hashlib.md5(json.dumps(headwords[headword], default=Sense.to_dict).encode("UTF-8")).hexdigest() for headword in headwords}
+
+    if os.path.exists(manifest_filename) and os.path.exists("headwords.json"):
+        with gzip.open(manifest_filename, "rb") as manifest_file:
+            manifest = pickle.load(manifest_file)
+
+        # orphaned alt forms are only saved if the bonus searches were run
+        if manifest["code"] != code_fingerprint or (run_bonus_scripts and not manifest["bonus"]):
+            print("%s is out of date, so every headword will be rebuilt." % manifest_filename)
+            manifest = None
+
+    if manifest is not None:
+        changed_headwords = {headword for headword in headwords if manifest["fingerprints"].get(headword) != headword_fingerprints[headword]}
+        changed_headwords.update(headword for headword in manifest["fingerprints"] if headword not in headwords)
+
+        print("Reading previous headwords.json for incremental rebuild...")
+
+        previous_headwords = json.loads(open("headwords.json", "r", encoding="UTF-8").read(), object_hook=Sense.from_json)
+
+        print(f"Done. {len(changed_headwords)} headwords have been added, changed, or removed since the last run.")
+
+phases.start_phase("bonus")
+
+if run_bonus_scripts:
+    print("BONUS: initiating bonus scripts...")
+
+    # the candidates for each search were already found while parsing, so all four searches only need a single pass to check which candidates don't have entries
+    # not all of these actually warrant pages, so make sure they're actually attested before adding them to wiktionary
+    # for example, as of writing "EC" only appears as part of the phrase "home ec", and while it's clear that EC is a clipping of "economics", DEJA and VU probably wouldn't warrant pages
+    print("BONUS: finding words which are part of multiword terms, hyphenated entries, and two-word entries without single-word forms, and redlinks...")
+
+    bonus_searches = {
+        "multiword": ("bonus_multiword.txt", "multiword-only words"),
+        "hyphenated": ("bonus_hyphenated.txt", "hyphenated-only entries"),
+        "twowords": ("bonus_twowords.txt", "two-word-only entries"),
+        "redlinks": ("bonus_redlinks.txt", "redlinks")
+    }
+    bonus_lines = {search: set() for search in bonus_searches}
+
+    for search, candidate, line in bonus_candidates:
+        if candidate not in entry_words:
+            bonus_lines[search].add(line)
+
+    for search, (filename, description) in bonus_searches.items():
+        bonus_out = open(filename, "w", encoding="UTF-8")
+
+        for line in sorted(bonus_lines[search], key=lambda x: (len(x.split(" ")[0]), x)):
+            bonus_out.write(line)
+
+        bonus_out.close()
+
+        print(f"Outputted {description} to {filename}.")
+
+    del bonus_candidates
+
+phases.end_phase(len(entry_words) if run_bonus_scripts else 0)
+
+headwords_out = open("headwords.json", "w", encoding="UTF-8")
+statuses_out = open("statuses.txt", "w", encoding="UTF-8")
+
+# headwords.json is written without any whitespace, which makes it much smaller and faster for editor.py and finalize.py to read
+# set this to True to indent it instead, e.g. for reading it yourself
+indent_headwords = False
+
+# set this to True to also output headwords.db, an sqlite database of the headwords and statuses which editor.py and finalize.py will use instead if use_database is set in database.py
+output_database = False
+
+pos_abbr = {
+    "contraction": "contr",
+    "intj": "interj",
+    "name": "n",
+    "noun": "n",
+    "num": "n",
+    "prep_phrase": "prep phrase",
+    "verb": "v"
+}
+
+def get_pos_abbr(s):
+    if s in pos_abbr.keys():
+        return pos_abbr[s]
+    else:
+        return s
 
-print(f"{n} entries done.")
 print("Expanding alternative forms...")
 
 if run_bonus_scripts:
@@ -383,10 +713,45 @@ alt_patterns = [
     r".*? spelling of (.*?)\.?$"
 ]
 
+compiled_alt_patterns = [re.compile(pattern, flags=re.IGNORECASE) for pattern in alt_patterns]
+alt_end_pattern = re.compile(r"(.*?)( \(|\.|;|:|,|!|\?|$)")
+
+# most patterns can only match glosses starting with a specific word, so only the patterns which could match a gloss's first word are tried, in their original order
+# if the first word isn't ascii, every pattern is tried, since case-insensitive matching treats some non-ascii characters (e.g. the long s) as equivalent to ascii ones
+alt_pattern_first_words = {}
+any_first_word_patterns = []
+
+for i, pattern in enumerate(alt_patterns):
+    first_word_match = re.match(r"\(?([\w'-]+)\)? ", pattern)
+
+    if first_word_match is not None:
+        first_word = first_word_match.group(1).lower()
+
+        if first_word not in alt_pattern_first_words:
+            alt_pattern_first_words[first_word] = []
+
+        alt_pattern_first_words[first_word].append(i)
+    else:
+        any_first_word_patterns.append(i)
+
+for first_word in alt_pattern_first_words:
+    alt_pattern_first_words[first_word] = sorted(alt_pattern_first_words[first_word] + any_first_word_patterns)
+
+all_patterns = list(range(len(alt_patterns)))
+
+def get_candidate_alt_patterns(gloss):
+    first_word = gloss.split(" ", 1)[0]
+
+    if not first_word.isascii():
+        return all_patterns
+
+    return alt_pattern_first_words.get(first_word.lower(), any_first_word_patterns)
+
+# number of senses matched by each pattern, to make it easier to find patterns which are no longer needed
+alt_pattern_hits = [0] * len(alt_patterns)
+
 # if an alternative form, make copies of sense with parentheticals for each definition of the word
 # sometimes captures too much, but if so, it just won't copy the sense since there's no definition associated with the captured string
-headwords_started = {}
-headwords_expanded = {}
 
 # returns whether inputted list has adjective/adverb forms ending in -er or -est
 def has_er_est_form(l):
@@ -394,7 +759,7 @@ def has_er_est_form(l):
     est_found = False
 
     for adj_form in l:
-        adj_form_unidecoded = unidecode(adj_form).upper()
+        adj_form_unidecoded = normalize(adj_form)
 
         if adj_form_unidecoded.isalpha() and len(adj_form_unidecoded) >= 3:
             if adj_form_unidecoded[-2:] == "ER":
@@ -405,114 +770,242 @@ def has_er_est_form(l):
 
     return er_found, est_found
 
-def expand_alts(headword):
-    # prevents infinite recursion
-    headwords_started[headword] = True
+# returns a list of (sense, matched text, alt text, alt, alt headword) for every alt pattern that matches a sense of the headword
+# this only depends on the glosses, so the whole alt-of graph can be worked out before anything is expanded
+def find_alts(headword):
+    alts = []
 
-    if headword not in headwords_expanded.keys():
-        sense_copies = []
+    for sense in headwords[headword]:
+        for i in get_candidate_alt_patterns(sense["gloss"]):
+            match = compiled_alt_patterns[i].match(sense["gloss"])
 
-        for sense in headwords[headword]:
-            for pattern in alt_patterns:
-                match = re.match(pattern, sense["gloss"], flags=re.IGNORECASE)
+            if match is not None:
+                alt_pattern_hits[i] += 1
+                match2 = alt_end_pattern.match(match.group(1))
+
+                if match2 is not None:
+                    alt = match2.group(1)
+
+                    # if gloss is a single capitalized word, use lower case version instead
+                    if alt_patterns[i] == r"^([^\s]*?)\.?$":
+                        alt = alt.lower()
+
+                    if alt not in ["Saint", "St"]:
+                        alts.append((sense, match.group(1), match2.group(1), alt, normalize(alt)))
+
+    return alts
+
+# maps each headword to the other headwords its senses are alternative forms of, in the order they're referred to
+headword_alts = {}
+alt_graph = {}
+
+phases.start_phase("find alts")
+
+for headword in headwords:
+    headword_alts[headword] = find_alts(headword)
+    alt_graph[headword] = list(dict.fromkeys(alt_headword for _, _, _, _, alt_headword in headword_alts[headword] if alt_headword != headword and alt_headword in headwords))
+
+phases.end_phase(sum(len(alts) for alts in headword_alts.values()))
+
+# senses of each headword grouped by original word and abbreviated part of speech, so that the senses an alt form refers to can be looked up directly
+# built once a headword's expansion starts, and updated with the copies once it's finished
+sense_index = {}
+
+def index_senses(headword, senses):
+    for sense in senses:
+        key = (sense["word"], get_pos_abbr(sense["pos"]))
+
+        if key not in sense_index[headword]:
+            sense_index[headword][key] = []
+
+        sense_index[headword][key].append(sense)
+
+# copies the senses of alt_headword that the given alt refers to into sense_copies, returning whether any were found
+def copy_alt_senses(sense, matched, alt_text, alt_headword, sense_copies):
+    parent_sense_found = False
 
-                if match is not None:
-                    match2 = re.match(r"(.*?)( \(|\.|;|:|,|!|\?|$)", match.group(1))
+    for alt_sense in sense_index[alt_headword].get((sense["alt"], get_pos_abbr(sense["pos"])), []):
+        # the copy's tags are built up in a new list, since they would otherwise be shared with the original sense
+        sense_copy = sense.derive({"gloss": sense["gloss"].replace(matched, alt_text + " (" + alt_sense["gloss"] + ")"), "tags": list(sense["tags"]), "alt inflections": []})
 
-                    if match2 is not None:
-                        alt = match2.group(1)
+        for form in alt_sense["forms"]:
+            form_unidecoded = normalize(form)
 
-                        # if gloss is a single capitalized word, use lower case version instead
-                        if pattern == r"^([^\s]*?)\.?$":
-                            alt = alt.lower()
+            i = 0
+            while True:
+                if i >= min(len(alt_headword), len(form_unidecoded)) or alt_headword[i] != form_unidecoded[i]:
+                    break
 
-                        if alt not in ["Saint", "St"]:
-                            sense["alt"] = alt
+                i += 1
 
-                            alt_headword = unidecode(sense["alt"]).upper()
+            if (alt_headword[i:].isalpha() or alt_headword[i:] == "") and (form_unidecoded[i:].isalpha() or form_unidecoded[i:] == ""):
+                sense_copy["alt inflections"].append(f"{alt_headword[i:]}/{form_unidecoded[i:]}")
 
-                            parent_sense_found = False
+        # keep countability/comparability consistent between parent and child
+        if (alt_sense["pos"] == "noun" or alt_sense["pos"] == "name") and ("uncountable" in alt_sense["tags"] or "plural-normally" in alt_sense["tags"] or "plural-only" in alt_sense["tags"] or ("plural" in alt_sense["tags"] and len(alt_sense["forms"]) == 0)) and "countable" not in alt_sense["tags"] and "usually" not in alt_sense["tags"] and ("uncountable" not in sense_copy["tags"] or "countable" in sense_copy["tags"]):
+            sense_copy["tags"].append("uncountable")
 
-                            if alt_headword != headword:
-                                # find all senses with matching capitalization as well as matching part of speech
-                                if alt_headword in headwords:
-                                    if alt_headword not in headwords_started:
-                                        expand_alts(alt_headword)
+            if "countable" in sense_copy["tags"]:
+                sense_copy["tags"].remove("countable")
 
-                                    for alt_sense in headwords[alt_headword]:
-                                        if alt_sense["word"] == sense["alt"] and get_pos_abbr(alt_sense["pos"]) == get_pos_abbr(sense["pos"]):
-                                            sense_copy = deepcopy(sense)
-                                            sense_copy["gloss"] = sense["gloss"].replace(match.group(1), match2.group(1) + " (" + alt_sense["gloss"] + ")")
+            sense_copy["forms"] = []
 
-                                            sense_copy["alt inflections"] = []
+        if (alt_sense["pos"] == "noun" or alt_sense["pos"] == "name") and (("uncountable" not in alt_sense["tags"] and "plural" not in alt_sense["tags"] and "plural-only" not in alt_sense["tags"]) or "countable" in alt_sense["tags"] or "usually" in alt_sense["tags"]) and "countable" not in sense_copy["tags"] and "uncountable" in sense_copy["tags"]:
+            sense_copy["tags"].remove("uncountable")
 
-                                            for form in alt_sense["forms"]:
-                                                form_unidecoded = unidecode(form).upper()
+        if (alt_sense["pos"] in ["adj", "adv"] and "not-comparable" in alt_sense["tags"] and "comparable" not in alt_sense["tags"]) and "usually" not in alt_sense["tags"] and ("not-comparable" not in sense_copy["tags"] or "comparable" in sense_copy["tags"]):
+            sense_copy["tags"].append("not-comparable")
 
-                                                i = 0
-                                                while True:
-                                                    if i >= min(len(alt_headword), len(form_unidecoded)) or alt_headword[i] != form_unidecoded[i]:
-                                                        break
+            if "comparable" in sense_copy["tags"]:
+                sense_copy["tags"].remove("comparable")
 
-                                                    i += 1
+            sense_copy["forms"] = []
 
-                                                if (alt_headword[i:].isalpha() or alt_headword[i:] == "") and (form_unidecoded[i:].isalpha() or form_unidecoded[i:] == ""):
-                                                    sense_copy["alt inflections"].append(f"{alt_headword[i:]}/{form_unidecoded[i:]}")
+        # look for adj/adv forms which are single words ending in -er or -est
+        if alt_sense["pos"] in ["adj", "adv"] and has_er_est_form(alt_sense["forms"]) == (True, True):
+            sense_copy["tags"].append("ALLOW ADJ AUTOGEN")
 
-                                            # keep countability/comparability consistent between parent and child
-                                            if (alt_sense["pos"] == "noun" or alt_sense["pos"] == "name") and ("uncountable" in alt_sense["tags"] or "plural-normally" in alt_sense["tags"] or "plural-only" in alt_sense["tags"] or ("plural" in alt_sense["tags"] and len(alt_sense["forms"]) == 0)) and "countable" not in alt_sense["tags"] and "usually" not in alt_sense["tags"] and ("uncountable" not in sense_copy["tags"] or "countable" in sense_copy["tags"]):
-                                                sense_copy["tags"].append("uncountable")
+        for tag in ["vulgar", "derogatory", "offensive", "slur"]:
+            if tag in alt_sense["tags"] and tag not in sense_copy["tags"]:
+                sense_copy["tags"].append(tag)
 
-                                                if "countable" in sense_copy["tags"]:
-                                                    sense_copy["tags"].remove("countable")
+        # if A is an alt of B which is an alt of C, set A's parent to C (if C is alpha)
+        # this is so that the list of alternate forms in C's definition is more complete
+        if "alt" in alt_sense and normalize(alt_sense["alt"]).isalpha():
+            sense_copy["alt"] = alt_sense["alt"]
 
-                                                sense_copy["forms"] = []
+        sense_copies.append(sense_copy)
 
-                                            if (alt_sense["pos"] == "noun" or alt_sense["pos"] == "name") and (("uncountable" not in alt_sense["tags"] and "plural" not in alt_sense["tags"] and "plural-only" not in alt_sense["tags"]) or "countable" in alt_sense["tags"] or "usually" in alt_sense["tags"]) and "countable" not in sense_copy["tags"] and "uncountable" in sense_copy["tags"]:
-                                                sense_copy["tags"].remove("uncountable")
+        parent_sense_found = True
 
-                                            if (alt_sense["pos"] in ["adj", "adv"] and "not-comparable" in alt_sense["tags"] and "comparable" not in alt_sense["tags"]) and "usually" not in alt_sense["tags"] and ("not-comparable" not in sense_copy["tags"] or "comparable" in sense_copy["tags"]):
-                                                sense_copy["tags"].append("not-comparable")
+    return parent_sense_found
 
-                                                if "comparable" in sense_copy["tags"]:
-                                                    sense_copy["tags"].remove("comparable")
+headwords_started = set()
+headwords_expanded = set()
+alt_cycles = []
 
-                                                sense_copy["forms"] = []
+# each headword's parents are expanded before the headword itself, so that the parents' own alt copies get copied too
+# this walks the alt-of graph depth-first with an explicit stack rather than recursing, since alt chains can be longer than python's recursion limit
+# if a parent is still being expanded (i.e. the alt-of graph has a cycle), its senses are copied as they are at that point
+def expand_alts(root):
+    if root in headwords_started:
+        return
 
-                                            # look for adj/adv forms which are single words ending in -er or -est
-                                            if alt_sense["pos"] in ["adj", "adv"] and has_er_est_form(alt_sense["forms"]) == (True, True):
-                                                sense_copy["tags"].append("ALLOW ADJ AUTOGEN")
+    headwords_started.add(root)
+    sense_index[root] = {}
+    index_senses(root, headwords[root])
 
-                                            for tag in ["vulgar", "derogatory", "offensive", "slur"]:
-                                                if tag in alt_sense["tags"] and tag not in sense_copy["tags"]:
-                                                    sense_copy["tags"].append(tag)
+    # each frame is [headword, index of next alt, whether that alt's parent has already been expanded, sense copies]
+    stack = [[root, 0, False, []]]
 
-                                            # if A is an alt of B which is an alt of C, set A's parent to C (if C is alpha)
-                                            # this is so that the list of alternate forms in C's definition is more complete
-                                            if "alt" in alt_sense and unidecode(alt_sense["alt"]).isalpha():
-                                                sense_copy["alt"] = alt_sense["alt"]
+    while len(stack) > 0:
+        frame = stack[-1]
+        headword, position, parent_ready, sense_copies = frame
+        alts = headword_alts[headword]
 
-                                            sense_copies.append(sense_copy)
+        if position == len(alts):
+            headwords[headword] += sense_copies
+            index_senses(headword, sense_copies)
+            headwords_expanded.add(headword)
+            stack.pop()
+            continue
 
-                                            parent_sense_found = True
+        sense, matched, alt_text, alt, alt_headword = alts[position]
 
-                            if run_bonus_scripts and not parent_sense_found and headword.isalpha() and alt_headword.isalpha() and headword != alt_headword:
-                                orphans_lines.append(f"{headword} (parent {alt_headword})\n")
+        if not parent_ready:
+            sense["alt"] = alt
 
-        for sense_copy in sense_copies:
-            headwords[headword].append(sense_copy)
+            if alt_headword != headword and alt_headword in headwords:
+                if alt_headword not in headwords_started:
+                    headwords_started.add(alt_headword)
+                    sense_index[alt_headword] = {}
+                    index_senses(alt_headword, headwords[alt_headword])
 
-        headwords_expanded[headword] = True
+                    frame[2] = True
+                    stack.append([alt_headword, 0, False, []])
+                    continue
+                elif alt_headword not in headwords_expanded:
+                    cycle_start = [stack_frame[0] for stack_frame in stack].index(alt_headword)
+                    alt_cycles.append([stack_frame[0] for stack_frame in stack[cycle_start:]] + [alt_headword])
+
+        parent_sense_found = False
+
+        if alt_headword != headword:
+            if alt_headword in headwords:
+                parent_sense_found = copy_alt_senses(sense, matched, alt_text, alt_headword, sense_copies)
+
+            if run_bonus_scripts and not parent_sense_found and headword.isalpha() and alt_headword.isalpha() and headword != alt_headword:
+                orphans_lines.append(f"{headword} (parent {alt_headword})\n")
+
+        frame[1] += 1
+        frame[2] = False
+
+phases.start_phase("expand alts")
+
+# for an incremental rebuild, the headwords that need expanding are the changed ones and everything that's an alt form of them, directly or indirectly
+# (the parents of these are expanded too, but only so that they can be copied from)
+if changed_headwords is not None:
+    alt_children = {}
+
+    for headword, alts in headword_alts.items():
+        for _, _, _, _, alt_headword in alts:
+            if alt_headword != headword:
+                alt_children.setdefault(alt_headword, set()).add(headword)
+
+    rebuilt_headwords = set()
+    stack = list(changed_headwords)
+
+    while len(stack) > 0:
+        headword = stack.pop()
+
+        if headword not in rebuilt_headwords:
+            rebuilt_headwords.add(headword)
+            stack += alt_children.get(headword, [])
+
+    del alt_children
+
+    headwords_to_expand = [headword for headword in headwords if headword in rebuilt_headwords]
+else:
+    headwords_to_expand = headwords
 
 n = 0
 last_message = time.time()
-for headword in headwords:
+for headword in headwords_to_expand:
     expand_alts(headword)
 
     n += 1
     if time.time() - last_message >= 10:
         last_message = time.time()
-        print(f"Expanding alternative forms... ({n}/{len(headwords)} headwords done)")
+        print(f"Expanding alternative forms... ({n}/{len(headwords_to_expand)} headwords done)")
+
+# the inflections of the rebuilt headwords (both before and after this run) can also purge senses from other headwords, so those have to be rebuilt too
+if changed_headwords is not None:
+    inflection_pairs = {headword: get_inflection_pairs(headword) for headword in headwords_to_expand}
+    purge_targets = set()
+
+    for headword in rebuilt_headwords:
+        purge_targets.update(inflected_headword for word, inflected_headword in manifest["inflection pairs"].get(headword, []))
+        purge_targets.update(inflected_headword for word, inflected_headword in inflection_pairs.get(headword, []))
+
+    for headword in headwords:
+        if headword in purge_targets and headword not in rebuilt_headwords:
+            rebuilt_headwords.add(headword)
+            expand_alts(headword)
+            inflection_pairs[headword] = get_inflection_pairs(headword)
+
+    del purge_targets
+
+    print(f"{len([headword for headword in rebuilt_headwords if headword in headwords])} headwords will be rebuilt.")
+
+del headword_alts
+del sense_index
+
+# for an incremental rebuild, the headwords that weren't expanded have the same orphans and cycles as last time
+if changed_headwords is not None:
+    if run_bonus_scripts:
+        orphans_lines += [line for headword, lines in manifest["orphans"].items() if headword in headwords and headword not in headwords_started for line in lines]
+
+    alt_cycles += [cycle for cycle in manifest["cycles"] if all(headword in headwords and headword not in headwords_started for headword in cycle)]
 
 if run_bonus_scripts:
     for line in sorted(set(orphans_lines), key=lambda x: (len(x.split(" ")[0]), x)):
@@ -520,36 +1013,69 @@ if run_bonus_scripts:
 
     print("Outputted orphaned alternative forms to bonus_orphans.txt.")
 
+print(f"Done. {sum(alt_pattern_hits)} alternative form patterns matched.")
+
+for i, pattern in enumerate(alt_patterns):
+    if alt_pattern_hits[i] == 0:
+        print(f"No senses matched alternative form pattern {pattern}")
+
+# the alt-of graph is also saved separately, for anything else that needs to know which headwords are alternative forms of which
+print(f"Found {len(alt_cycles)} cycles of alternative forms. Outputting alt-of graph to alt_graph.json...")
+
+alt_graph_out = open("alt_graph.json", "w", encoding="UTF-8")
+alt_graph_out.write(json.dumps({"parents": {headword: parents for headword, parents in alt_graph.items() if len(parents) > 0}, "cycles": alt_cycles}, indent=4) + "\n")
+alt_graph_out.close()
+
 print("Done.")
 
+phases.end_phase(len(headwords_started))
+
 # there are some entries on wiktionary that don't link to their inflected forms, so the inflections that aren't linked to will have to be verified separately; other than these, however, we can remove most of the inflected senses and allow them to be automatically added later based on the original entry
+phases.start_phase("purge")
+
 print("Purging most inflections...")
 
+# only senses tagged with form-of can be purged, so these are looked up directly for each inflected headword rather than checking every sense
+# for an incremental rebuild, only the rebuilt headwords can have senses purged
+form_of_senses = {}
+
 for headword in headwords:
-    inflections = {}
+    if changed_headwords is None or headword in rebuilt_headwords:
+        for sense in headwords[headword]:
+            if "form-of" in sense["tags"]:
+                if headword not in form_of_senses:
+                    form_of_senses[headword] = []
 
-    for sense in headwords[headword]:
-        word = sense["word"]
+                form_of_senses[headword].append(sense)
+
+# the inflection pairs of every headword are saved in the manifest, and for an incremental rebuild, the headwords that aren't being rebuilt have the same ones as last time
+if changed_headwords is not None:
+    for headword in headwords:
+        if headword not in inflection_pairs:
+            inflection_pairs[headword] = manifest["inflection pairs"].get(headword, set())
+elif incremental_rebuild:
+    inflection_pairs = {headword: get_inflection_pairs(headword) for headword in headwords}
 
-        if word not in inflections:
-            inflections[word] = (set())
+purged_senses = set()
+purged_headwords = set()
 
-        for form in sense["forms"]:
-            inflections[word].add(form)
+for headword in headwords:
+    for word, inflected_headword in inflection_pairs[headword] if incremental_rebuild else get_inflection_pairs(headword):
+        if inflected_headword in form_of_senses:
+            for sense in form_of_senses[inflected_headword]:
+                if word in sense["gloss"]:
+                    purged_senses.add(id(sense))
+                    purged_headwords.add(inflected_headword)
 
-    for word in inflections:
-        for inflection in inflections[word]:
-            inflected_headword = unidecode(inflection).upper()
+for headword in purged_headwords:
+    headwords[headword] = [sense for sense in headwords[headword] if id(sense) not in purged_senses]
 
-            if inflected_headword in headwords:
-                for sense in headwords[inflected_headword]:
-                    if "form-of" in sense["tags"] and word in sense["gloss"]:
-                        sense["delete"] = True
+del form_of_senses
 
-for headword in headwords:
-    for sense in list(headwords[headword]):
-        if "delete" in sense.keys():
-            headwords[headword].remove(sense)
+# the order of the headwords is kept so that the rebuilt and previous headwords can be put back together in the same order as a full rebuild
+if changed_headwords is not None:
+    all_headwords = list(headwords)
+    headwords = {headword: headwords[headword] for headword in headwords if headword in rebuilt_headwords}
 
 print("Done.")
 # the reason we didn't do this earlier is because some single-word entries relate back to multi-word entries, so we want to preserve their defs
@@ -560,9 +1086,20 @@ for headword in list(headwords.keys()):
         del headwords[headword]
 
 print("Done.")
+
+phases.end_phase(len(purged_senses))
+phases.start_phase("autogen")
+
 print("Automatically adding inflections for some words... (these can be rejected later)")
 
 # warning: this will occasionally lead to some clearly nonsensical constructions that i can't be bothered to figure out how to automatically filter out, so just reject those when they pop up
+# each autogenerated sense is [headword, sense it's based on, forms to add to it], in the order they're added
+# the forms from the inflection rules (see inflect.py) are worked out afterwards, one batch per set of rules
+autogen_senses = []
+plural_batch = []
+verb_batch = []
+comparative_batch = []
+
 for headword in headwords:
     # pluralizes the following types of senses:
     # "unknown or uncertain plurals" (does not have forms listed but also does not have "uncountable" tag)
@@ -570,121 +1107,47 @@ for headword in headwords:
     # any entries that use {{head|en|noun}} or {{head|en|verb}} directly and thus don't list inflections
     # uncountable/uncomparable senses that are alt forms of countable/comparable senses
     # verbs/adjectives/adverbs which have some, but not all, of their inflections
-    for sense in copy(headwords[headword]):
+    for sense in headwords[headword]:
         # for carrying over irregular inflections between alt forms
         if "alt inflections" in sense and len(sense["alt inflections"]) != 0:
-            sense_copy = deepcopy(sense)
+            forms = []
 
             for alt_inflection_pattern in sense["alt inflections"]:
                 removal, addition = alt_inflection_pattern.split("/")
 
                 if len(headword) >= len(removal) and headword[len(headword)-len(removal):] == removal:
-                    sense_copy["forms"].append(headword[:len(headword)-len(removal)] + addition)
+                    forms.append(headword[:len(headword)-len(removal)] + addition)
 
-            sense_copy["tags"].append("AUTOGEN")
-            headwords[headword].append(sense_copy)
+            autogen_senses.append([headword, sense, forms])
 
         # please forgive me for this monstrosity
         if sense["pos"] in ["noun", "num"] and len(sense["forms"]) == 0 and ("countable" in sense["tags"] or (("uncountable" not in sense["tags"] and "singular-only" not in sense["tags"] and "form-of" not in sense["tags"] and "plural" not in sense["tags"]) or "no-plural" in sense["tags"]) and "plural" not in sense["gloss"]):
-            if len(headword) >= 3 and headword[-3:] == "MAN" and headword not in ["BIRMAN", "BRACHMAN", "BRAMAN", "DISCMAN", "FLEHMAN", "HESSEMAN", "IMMELMAN", "KERMAN", "KUMAN", "KUNSTLEROMAN", "KURMAN", "LYERMAN", "OSMAN", "OTHMAN", "ROMAN", "YALMAN", "YELMAN", "ZAMAN"]:
-                plural = headword[:-3] + "MEN"
-            elif len(headword) >= 4 and headword[-4:] == "FOOT" and headword not in ["ICEFOOT", "SALTFOOT", "SOWFOOT", "SWIFTFOOT"]:
-                plural = headword[:-3] + "EET"
-            elif len(headword) >= 4 and headword[-4:] == "LOAF":
-                plural = headword[:-1] + "VES"
-            elif len(headword) >= 5 and headword[-5:] == "TOOTH":
-                plural = headword[:-4] + "EETH"
-            elif len(headword) >= 6 and headword[-6:] == "PERSON":
-                plural = headword[:-4] + "OPLE"
-            elif headword[-1] == "Y" and len(headword) >= 2 and headword[-2] not in "AEIOUY":
-                plural = headword[:-1] + "IES"
-            elif headword[-3:] == "SIS" or (len(headword) >= 6 and headword[-3:] == "XIS"):
-                plural = headword[:-2] + "ES"
-            elif ((headword[-1] in "JSXZ" and (len(headword) < 3 or headword[-3:] != "OUX")) or headword[-2:] in ["SH", "ZH"] or headword[-3:] in ["NCH", "SCH", "TCH"] or headword[-4:] in ["EACH", "EECH", "OACH", "OOCH", "OUCH"]) or headword in ["ARCH", "ARCSECH", "ARRACACH", "ARRACH", "ARSECH", "CESAREVICH", "KNOLYCH", "KNOWLECH", "KNOWLYCH", "MAIZESTARCH", "SANDWHICH", "SPINNACH", "TUCH", "WICH"]:
-                plural = headword + "ES"
-            else:
-                plural = headword + "S"
-
-            sense_copy = deepcopy(sense)
-            sense_copy["forms"].append(plural)
-            sense_copy["tags"].append("AUTOGEN")
-            headwords[headword].append(sense_copy)
+            plural_batch.append(len(autogen_senses))
+            autogen_senses.append([headword, sense, None])
 
         if sense["pos"] == "verb" and len(sense["forms"]) <= 2 and "form-of" not in sense["tags"]:
-            s = None
-            ing = None
-            ed = None
-
-            if headword[-1] == "Y" and len(headword) >= 2 and headword[-2] not in "AEIOUY":
-                s = headword[:-1] + "IES"
-                ing = headword + "ING"
-                ed = headword[:-1] + "IED"
-            elif headword[-1] == "E" and sense["word"][-1] != "é":
-                ed = headword + "D"
-                s = headword + "S"
-
-                if len(headword) >= 2 and headword[-2] not in "AEIO":
-                    ing = headword[:-1] + "ING"
-                else:
-                    ing = headword + "ING"
-            elif len(headword) >= 2 and headword[-1] in "BCDFGKLMNPRSTV" and headword[-2] in "AEIOUY" and headword[-1] != headword[-2] and headword[-2:] not in ["EN"] and (len(headword) == 2 or (headword[-2] != headword[-3] and headword[-3] not in "AEIOU")) and (len(headword) < 4 or headword[-2:] not in ["ER"]) and headword not in ["COMISERAT", "DIAGNOSIS", "LYK", "MANET", "TACET"]:
-                if headword[-1] == "S":
-                    s = headword + "SES"
-                else:
-                    s = headword + "S"
-
-                ing = headword + headword[-1] + "ING"
-                ed = headword + headword[-1] + "ED"
-            elif headword[-1] in "JXZ" or headword[-2:] in ["SH", "ZH"] or headword[-3:] in ["NCH", "SCH", "TCH"] or headword[-4:] in ["EACH", "EECH", "OACH", "OOCH", "OUCH"]:
-                s = headword + "ES"
-                ing = headword + "ING"
-                ed = headword + "ED"
-            else:
-                if headword[-1] == "S":
-                    s = headword + "ES"
-                else:
-                    s = headword + "S"
+            verb_batch.append(len(autogen_senses))
+            autogen_senses.append([headword, sense, None])
 
-                ing = headword + "ING"
-                ed = headword + "ED"
+        if ("ALLOW ADJ AUTOGEN" in sense["tags"] or (sense["pos"] == "adj" and has_er_est_form(sense["forms"]) != (False, False))) and has_er_est_form(sense["forms"]) != (True, True) and "form-of" not in sense["tags"]:
+            comparative_batch.append(len(autogen_senses))
+            autogen_senses.append([headword, sense, None])
 
-            sense_copy = deepcopy(sense)
-            sense_copy["forms"].append(s)
-            sense_copy["forms"].append(ing)
-            sense_copy["forms"].append(ed)
-            sense_copy["tags"].append("AUTOGEN")
-            headwords[headword].append(sense_copy)
+for compiled, batch in [(compiled_plural_rules, plural_batch), (compiled_verb_rules, verb_batch), (compiled_comparative_rules, comparative_batch)]:
+    for i, forms in zip(batch, inflect_all(compiled, [(autogen_senses[i][0], autogen_senses[i][1]["word"], autogen_senses[i][1].get("alt")) for i in batch])):
+        autogen_senses[i][2] = forms
 
-        if ("ALLOW ADJ AUTOGEN" in sense["tags"] or (sense["pos"] == "adj" and has_er_est_form(sense["forms"]) != (False, False))) and has_er_est_form(sense["forms"]) != (True, True) and "form-of" not in sense["tags"]:
-            er = None
-            est = None
-
-            if "alt" in sense and sense["alt"] == "far":
-                er = headword + "THER"
-                est = headword + "THEST"
-            elif headword[-1] == "Y" and len(headword) >= 2 and headword[-2:] == "EY" and (len(headword) < 3 or headword[-3] != "I"):
-                er = headword[:-2] + "IER"
-                est = headword[:-2] + "IEST"
-            elif headword[-1] == "Y" and len(headword) >= 2 and headword[-2] not in "AEIOUY":
-                er = headword[:-1] + "IER"
-                est = headword[:-1] + "IEST"
-            elif headword[-1] == "E" and sense["word"][-1] != "é":
-                er = headword + "R"
-                est = headword + "ST"
-            elif len(headword) >= 2 and headword[-1] in "BCDFGKLMNPRSTV" and (len(headword) < 4 or headword[-2:] not in ["AL", "AN", "EN", "ER", "IC", "ID", "IN", "ON"]) and (len(headword) < 3 or headword[-3:] not in ["AYN", "EAT", "LES", "LUT", "OUS"]) and (len(headword) < 5 or headword[-2:] != "ED") and headword[-2] in "AEIOUY" and (len(headword) < 3 or headword[-3] not in "AEIOU" or headword == "BAAAD") and headword[-1] != headword[-2] and (len(headword) == 2 or headword[-2] != headword[-3] or headword == "BAAAD") and headword not in ["BUCKSOM", "EEEVIL", "HOLESOM", "NICKEL", "NOBEL", "OL", "SUBTIL", "YALLAR"]:
-                er = headword + headword[-1] + "ER"
-                est = headword + headword[-1] + "EST"
-            else:
-                er = headword + "ER"
-                est = headword + "EST"
-
-            sense_copy = deepcopy(sense)
-            sense_copy["forms"].append(er)
-            sense_copy["forms"].append(est)
-            sense_copy["tags"].append("AUTOGEN")
-            headwords[headword].append(sense_copy)
+for headword, sense, forms in autogen_senses:
+    headwords[headword].append(sense.derive({"forms": sense["forms"] + forms, "tags": sense["tags"] + ["AUTOGEN"]}))
 
 print("Done.")
+
+phases.end_phase(len(autogen_senses))
+
+del autogen_senses
+
+phases.start_phase("render")
+
 print("Rendering senses...")
 
 excluded_tags = {
@@ -949,84 +1412,122 @@ excluded_tags = {
     "with singular verb",
 }
 
-for headword in headwords:
-    for sense in headwords[headword]:
-        definition = ""
+# returns the list of tags shown at the start of a definition, e.g. "(informal, UK) "
+# there are far fewer distinct combinations of tags than there are senses, so each combination is only rendered once
+@lru_cache(maxsize=None)
+def render_tags(tags):
+    # remove excluded and duplicate tags
+    tags_to_include = list(dict.fromkeys(tag.replace("-", " ") for tag in tags if tag not in excluded_tags))
 
-        tags_to_include = []
+    # if visible tags list contains ONLY these tags, make them invisible
+    if set(tags_to_include) <= {"also", "especially", "often", "sometimes", "specifically", "usually"}:
+        return ""
 
-        for tag in sense["tags"]:
-            if tag not in excluded_tags:
-                tags_to_include.append(tag.replace("-", " "))
+    tags_shown = []
 
-        # remove duplicate tags
-        tags_to_include = list(dict.fromkeys(tags_to_include))
+    for tag in tags_to_include:
+        superstring_found = False
 
-        # if visible tags list contains ONLY these tags, make them invisible
-        if set(tags_to_include) <= {"also", "especially", "often", "sometimes", "specifically", "usually"}:
-            tags_to_include = []
+        # don't add tag to definition text if it's a substring of another tag
+        # usually case insensitive, though "UK" and "US" do require case sensitivity
+        for other_tag in tags_to_include:
+            if tag != other_tag and ((tag.lower() in other_tag.lower() and (tag not in ["UK", "US"] or tag in other_tag)) or (tag == "figuratively" and "figurative" in other_tag and other_tag != "figurative")):
+                superstring_found = True
+                break
 
-        if len(tags_to_include) >= 1:
-            definition += "("
+        if not superstring_found:
+            tags_shown.append(tag)
 
-            for tag in tags_to_include:
-                superstring_found = False
+    # every tag can only be hidden if some of them differ only in case, in which case this has always been rendered as just ") "
+    if len(tags_shown) == 0:
+        return ") "
 
-                # don't add tag to definition text if it's a substring of another tag
-                # usually case insensitive, though "UK" and "US" do require case sensitivity
-                for other_tag in tags_to_include:
-                    if tag != other_tag and ((tag.lower() in other_tag.lower() and (tag not in ["UK", "US"] or tag in other_tag)) or (tag == "figuratively" and "figurative" in other_tag and other_tag != "figurative")):
-                        superstring_found = True
+    return "(" + ", ".join(tags_shown) + ") "
 
-                if not superstring_found:
-                    definition += tag + ", "
+for headword in headwords:
+    for sense in headwords[headword]:
+        # also saved for editor.py and finalize.py, so that they don't have to normalize every form themselves
+        forms = normalize_forms(sense["forms"])
+        sense["normalized forms"] = forms
 
-            definition = definition[:-2] + ") "
+        if len(forms) >= 1:
+            sense["def"] = f"{render_tags(tuple(sense["tags"]))}{sense["gloss"]} [{get_pos_abbr(sense["pos"])} {", ".join(forms)}]"
+        else:
+            sense["def"] = f"{render_tags(tuple(sense["tags"]))}{sense["gloss"]} [{get_pos_abbr(sense["pos"])}]"
 
-        definition += sense["gloss"] + " ["
-        definition += get_pos_abbr(sense["pos"])
+print("Done.")
 
-        forms = []
+phases.end_phase(sum(len(senses) for senses in headwords.values()))
 
-        for form in sense["forms"]:
-            form_unidecoded = unidecode(form).upper()
+if changed_headwords is not None:
+    print("Combining rebuilt headwords with previous headwords.json...")
 
-            if form_unidecoded.isalpha() and form_unidecoded not in forms:
-                forms.append(form_unidecoded)
+    combined_headwords = {}
 
-        if len(forms) >= 1:
-            definition += " "
+    for headword in all_headwords:
+        if headword in rebuilt_headwords:
+            if headword in headwords:
+                combined_headwords[headword] = headwords[headword]
+        elif headword in previous_headwords:
+            combined_headwords[headword] = previous_headwords[headword]
 
-            for form in forms:
-                definition += form + ", "
+    headwords = combined_headwords
 
-            definition = definition[:-2] + "]"
-        else:
-            definition += "]"
+    del combined_headwords
+    del all_headwords
 
-        sense["def"] = definition
+    print("Done.")
+
+phases.start_phase("dedupe")
 
-print("Done.")
 print("Deleting duplicate definitions...")
 
 digests = {}
 
 for headword in headwords:
-    for sense in list(headwords[headword]):
+    unique_senses = []
+
+    for sense in headwords[headword]:
         digest = hashlib.md5((sense["word"] + sense["def"]).encode("UTF-8")).hexdigest()
 
-        if digest in digests.keys():
-            headwords[headword].remove(sense)
-        else:
+        if digest not in digests:
             sense["md5"] = digest
             digests[digest] = sense
+            unique_senses.append(sense)
+
+    headwords[headword] = unique_senses
 
 print("Done.")
+
+phases.end_phase(len(digests))
+phases.start_phase("output")
+
 print(f"Outputting {len(headwords)} headwords to headwords.json...")
 
-headwords_out.write(unidecode(json.dumps(headwords, indent=4) + "\n"))
+# written one headword at a time, so that the whole file never has to be held in memory as a single string
+# non-ascii characters are escaped by json.dumps, so the output is plain ascii either way
+for i, headword in enumerate(headwords):
+    if indent_headwords:
+        headwords_out.write(("{\n" if i == 0 else ",\n") + "    " + json.dumps(headword) + ": " + json.dumps(headwords[headword], indent=4, default=Sense.to_dict).replace("\n", "\n    "))
+    else:
+        headwords_out.write(("{" if i == 0 else ",") + json.dumps(headword) + ":" + json.dumps(headwords[headword], separators=(",", ":"), default=Sense.to_dict))
+
+if len(headwords) == 0:
+    headwords_out.write("{}\n")
+elif indent_headwords:
+    headwords_out.write("\n}\n")
+else:
+    headwords_out.write("}\n")
 
 print("Data outputted to headwords.json.")
+
+if output_database:
+    print("Outputting headwords to headwords.db...")
+
+    write_database(headwords)
+
+    print("Data outputted to headwords.db.")
+
 print("Auto-assessing some senses...")
 
 auto_assessed = 0
@@ -1042,7 +1543,52 @@ for digest in digests:
         auto_assessed += 1
 
 print(f"Outputted {auto_assessed} auto-assessed senses to statuses.txt.")
+
+if changed_headwords is not None:
+    print("Outputting added, changed, and removed senses to changes.json...")
+
+    changes = {"added": [], "changed": [], "removed": []}
+    previous_digests = {sense["md5"] for senses in previous_headwords.values() for sense in senses}
+
+    for headword in dict.fromkeys(list(previous_headwords) + list(headwords)):
+        previous_md5s = [sense["md5"] for sense in previous_headwords.get(headword, [])]
+        md5s = [sense["md5"] for sense in headwords.get(headword, [])]
+        removed = [md5 for md5 in previous_md5s if md5 not in digests]
+        added = [md5 for md5 in md5s if md5 not in previous_digests]
+
+        # senses of the same headword that were removed and added are paired up in order as changed ones, e.g. a definition whose wording was updated
+        changes["changed"] += [[previous_md5, md5] for previous_md5, md5 in zip(removed, added)]
+        changes["removed"] += removed[len(added):]
+        changes["added"] += added[len(removed):]
+
+    changes_out = open("changes.json", "w", encoding="UTF-8")
+    changes_out.write(json.dumps(changes, indent=4) + "\n")
+    changes_out.close()
+
+    print(f"Done. {len(changes["added"])} senses added, {len(changes["changed"])} changed, {len(changes["removed"])} removed.")
+
+if incremental_rebuild:
+    print(f"Saving manifest for the next incremental rebuild to {manifest_filename}...")
+
+    orphans = {}
+
+    if run_bonus_scripts:
+        for line in set(orphans_lines):
+            orphans.setdefault(line.split(" ")[0], []).append(line)
+
+    # written to a temporary file first, like the parse cache
+    with gzip.open(manifest_filename + ".tmp", "wb", compresslevel=4) as manifest_file:
+        pickle.dump({"code": code_fingerprint, "bonus": run_bonus_scripts, "fingerprints": headword_fingerprints, "inflection pairs": inflection_pairs, "orphans": orphans, "cycles": alt_cycles}, manifest_file, pickle.HIGHEST_PROTOCOL)
+
+    os.replace(manifest_filename + ".tmp", manifest_filename)
+
+    print("Done.")
 print("Closing files...")
 
 headwords_out.close()
-statuses_out.close()
\ No newline at end of file
+statuses_out.close()
+
+phases.end_phase(len(headwords))
+phases.write_report(phase_report_filename)
+
+print(f"Outputted timings of each phase to {phase_report_filename}.")
\ No newline at end of file
@@ -0,0 +1,23 @@
+from functools import lru_cache
+from unidecode import unidecode
+
+# shared by initialize.py, editor.py, and finalize.py
+# unidecode is slow and gets called on the same strings (forms, headwords, glosses) over and over, so its results are cached, up to this many at a time
+normalize_cache_size = 2**18
+
+# converts a word to the form used for headwords, e.g. "café" to "CAFE"
+@lru_cache(maxsize=normalize_cache_size)
+def normalize(s):
+    return unidecode(s).upper()
+
+# returns the normalized versions of the given forms which are purely alphabetical, in order and without duplicates
+def normalize_forms(forms):
+    normalized_forms = []
+
+    for form in forms:
+        normalized_form = normalize(form)
+
+        if normalized_form.isalpha() and normalized_form not in normalized_forms:
+            normalized_forms.append(normalized_form)
+
+    return normalized_forms
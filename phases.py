@@ -0,0 +1,84 @@
+import cProfile
+import json
+import sys
+import time
+import tracemalloc
+
+# resource isn't available on windows, in which case peak memory usage is only recorded if trace_memory is set
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# records how long each phase of initialize.py takes and how much memory it uses, so that builds can be compared with each other
+# each phase is started with start_phase and ended with end_phase, and write_report outputs everything recorded so far as json
+
+# set these before starting any phases
+# profile: saves a cProfile dump of each phase to profile_(phase name).prof, which can be read with e.g. python -m pstats
+# trace_memory: records the peak memory allocated by python during each phase, which is more precise than the peak RSS but slows everything down considerably
+profile = False
+trace_memory = False
+
+phases = []
+current_phase = None
+
+def get_peak_rss():
+    if resource is None:
+        return None
+
+    # kilobytes on linux, but bytes on macos
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak_rss / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+# includes the time spent in worker processes, once they've finished
+def get_cpu_time():
+    if resource is None:
+        return time.process_time()
+
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+def start_phase(name):
+    global current_phase
+
+    if current_phase is not None:
+        end_phase()
+
+    current_phase = {"name": name, "start": time.perf_counter(), "cpu start": get_cpu_time()}
+
+    if trace_memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        tracemalloc.reset_peak()
+
+    if profile:
+        current_phase["profiler"] = cProfile.Profile()
+        current_phase["profiler"].enable()
+
+# count is the number of items (entries, senses, headwords, etc.) the phase went through, if that means anything for it
+def end_phase(count=None):
+    global current_phase
+
+    if "profiler" in current_phase:
+        current_phase["profiler"].disable()
+        current_phase["profiler"].dump_stats(f"profile_{current_phase["name"].replace(" ", "_")}.prof")
+
+    phase = {
+        "name": current_phase["name"],
+        "wall seconds": round(time.perf_counter() - current_phase["start"], 3),
+        "cpu seconds": round(get_cpu_time() - current_phase["cpu start"], 3),
+        "peak rss mb": get_peak_rss(),
+        "count": count
+    }
+
+    if trace_memory:
+        phase["traced peak mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+
+    phases.append(phase)
+    current_phase = None
+
+def write_report(filename):
+    report_out = open(filename, "w", encoding="UTF-8")
+    report_out.write(json.dumps({"phases": phases, "total wall seconds": round(sum(phase["wall seconds"] for phase in phases), 3), "peak rss mb": get_peak_rss()}, indent=4) + "\n")
+    report_out.close()
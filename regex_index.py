@@ -0,0 +1,133 @@
+from array import array
+from bisect import bisect_left
+import re
+from re import _parser
+from re._constants import ATOMIC_GROUP, BRANCH, LITERAL, MAX_REPEAT, MIN_REPEAT, POSSESSIVE_REPEAT, SUBPATTERN
+
+# trigram indexes for narrowing down regex searches, used by editor.py
+# any match of a regex like "Alternative form of" or "ING$" has to contain certain literal strings, so it can only match text containing every trigram (three-character substring) of those strings
+# an index maps each trigram (as a tuple of characters, which is quicker to generate than a string) to a sorted array of the ids of the items whose text contains it, so the items that could possibly match are found by intersecting these, and only those need to be searched with the actual regex
+# regexes which don't require any literals of three or more characters (e.g. "^S" or "[A-Z]"), or which are case-insensitive, can't be narrowed down, so every item has to be searched as usual
+
+# items is a sequence of lists (or sets) of texts, where each item's id is its position in the sequence
+def build_index(items):
+    index = {}
+
+    for i, texts in enumerate(items):
+        # joining the texts only adds trigrams containing the newline, which at worst gives a few extra candidates
+        text = "\n".join(texts)
+
+        for trigram in set(zip(text, text[1:], text[2:])):
+            ids = index.get(trigram)
+
+            if ids is None:
+                ids = index[trigram] = array("I")
+
+            ids.append(i)
+
+    return index
+
+# returns a list of clauses, each of which is a list of strings, at least one of which is contained in any match of the parsed regex
+def get_clauses(parsed):
+    clauses = []
+    run = ""
+
+    for op, av in parsed:
+        # consecutive literal characters always appear together
+        if op == LITERAL:
+            run += chr(av)
+            continue
+
+        if run != "":
+            clauses.append([run])
+            run = ""
+
+        if op == SUBPATTERN:
+            group, add_flags, del_flags, subpattern = av
+
+            # case-insensitive groups like (?i:...) can match text that doesn't contain their literals exactly
+            if not add_flags & re.IGNORECASE:
+                clauses += get_clauses(subpattern)
+        elif op in [MAX_REPEAT, MIN_REPEAT, POSSESSIVE_REPEAT]:
+            min_repeat, max_repeat, subpattern = av
+
+            if min_repeat >= 1:
+                clauses += get_clauses(subpattern)
+        elif op == ATOMIC_GROUP:
+            clauses += get_clauses(av)
+        elif op == BRANCH:
+            # a match contains one of the alternatives, so if each alternative requires a usable literal, the longest one from each of them gives a clause
+            branch_clause = []
+
+            for alternative in av[1]:
+                usable_clauses = [clause for clause in get_clauses(alternative) if min(len(literal) for literal in clause) >= 3]
+
+                if len(usable_clauses) == 0:
+                    branch_clause = None
+                    break
+
+                branch_clause += max(usable_clauses, key=lambda x: min(len(literal) for literal in x))
+
+            if branch_clause is not None:
+                clauses.append(branch_clause)
+
+        # anything else (character classes, anchors, lookarounds, backreferences, etc.) doesn't require any particular literal
+
+    if run != "":
+        clauses.append([run])
+
+    return clauses
+
+# returns None if the regex is invalid or case-insensitive, in which case it can't be narrowed down
+def get_required_literals(pattern):
+    try:
+        parsed = _parser.parse(pattern)
+    except (re.error, OverflowError, RecursionError):
+        return None
+
+    if parsed.state.flags & re.IGNORECASE:
+        return None
+
+    return get_clauses(parsed)
+
+def contains(ids, i):
+    j = bisect_left(ids, i)
+
+    return j < len(ids) and ids[j] == i
+
+# returns the ids of the items containing every trigram of the literal, starting with the rarest trigram
+def find_literal(index, literal):
+    postings = [index.get(trigram) for trigram in zip(literal, literal[1:], literal[2:])]
+
+    if any(ids is None for ids in postings):
+        return []
+
+    postings.sort(key=len)
+    candidates = postings[0]
+
+    for ids in postings[1:]:
+        candidates = [i for i in candidates if contains(ids, i)]
+
+    return candidates
+
+# returns the set of ids of the items which could match the regex, or None if the index can't narrow it down
+def find_candidates(index, pattern):
+    clauses = get_required_literals(pattern)
+
+    if clauses is None:
+        return None
+
+    candidates = None
+
+    for clause in clauses:
+        if min(len(literal) for literal in clause) < 3:
+            continue
+
+        clause_candidates = set()
+
+        for literal in clause:
+            clause_candidates.update(find_literal(index, literal))
+
+        candidates = clause_candidates if candidates is None else candidates & clause_candidates
+
+    return candidates
@@ -0,0 +1,89 @@
+import sys
+
+from normalize import normalize_forms
+
+# a single sense of a headword, shared by initialize.py, editor.py, and finalize.py
+# this takes up much less memory than a dict per sense, but still supports the same sense["key"] access, so the templates and the rest of the code can use it the same way
+class Sense:
+    __slots__ = ("word", "gloss", "pos", "forms", "tags", "alt", "alt_inflections", "normalized_forms", "definition", "md5")
+
+    # maps each key in headwords.json to the slot storing it, in the order they're written out
+    keys = {
+        "word": "word",
+        "gloss": "gloss",
+        "pos": "pos",
+        "forms": "forms",
+        "tags": "tags",
+        "alt": "alt",
+        "alt inflections": "alt_inflections",
+        "normalized forms": "normalized_forms",
+        "def": "definition",
+        "md5": "md5"
+    }
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, Sense.keys[key])
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        setattr(self, Sense.keys[key], value)
+
+    def __contains__(self, key):
+        return key in Sense.keys and hasattr(self, Sense.keys[key])
+
+    def get(self, key, default=None):
+        return getattr(self, Sense.keys[key], default)
+
+    # returns a new sense (e.g. an alt copy or an automatically added inflection) with the given keys overridden and every other field shared with this one
+    # this is much faster than deepcopy, but it means that shared fields must never be modified in place; any list that's going to change should be passed in as a new list instead
+    def derive(self, overrides):
+        sense = Sense()
+
+        for slot in Sense.__slots__:
+            if hasattr(self, slot):
+                setattr(sense, slot, getattr(self, slot))
+
+        for key, value in overrides.items():
+            sense[key] = value
+
+        return sense
+
+    # for writing to headwords.json
+    def to_dict(self):
+        return {key: getattr(self, slot) for key, slot in Sense.keys.items() if hasattr(self, slot)}
+
+    # for reading from headwords.json, e.g. json.loads(text, object_hook=Sense.from_json)
+    # senses loaded this way are only meant to be read, so their lists are stored as tuples, and identical tag lists are only stored once
+    @staticmethod
+    def from_json(d):
+        if "md5" not in d or "gloss" not in d:
+            return d
+
+        sense = Sense()
+
+        for key, value in d.items():
+            if key in Sense.keys:
+                if type(value) is list:
+                    value = tuple(value)
+
+                sense[key] = value
+
+        sense.word = sys.intern(sense.word)
+        sense.pos = sys.intern(sense.pos)
+        sense.tags = intern_tags(sense.tags)
+
+        # older versions of initialize.py didn't save the normalized forms of each sense
+        if "normalized forms" not in sense:
+            sense.normalized_forms = tuple(normalize_forms(sense.forms))
+
+        return sense
+
+# there are only a few thousand distinct combinations of tags across over a million senses
+interned_tags = {}
+
+def intern_tags(tags):
+    tags = tuple(sys.intern(tag) for tag in tags)
+
+    return interned_tags.setdefault(tags, tags)
@@ -0,0 +1,101 @@
+from bisect import bisect_left, insort
+
+# a sorted list which items can be added to and removed from quickly, used by editor.py for its queues of pending headwords
+# the items are split into blocks of up to twice block_size, so adding or removing one only has to shift the rest of its block rather than the whole list, and finding the items at a given position only has to skip over whole blocks before it
+# the items have to be unique
+
+block_size = 1000
+
+class SortedList:
+    __slots__ = ("key", "blocks", "maxes", "length")
+
+    # key works the same way as the key of sorted
+    def __init__(self, items, key=None):
+        self.key = key if key is not None else lambda x: x
+
+        items = sorted(items, key=self.key)
+        self.blocks = [items[i:i+block_size] for i in range(0, len(items), block_size)]
+        self.maxes = [self.key(block[-1]) for block in self.blocks]
+        self.length = len(items)
+
+    def __len__(self):
+        return self.length
+
+    def add(self, item):
+        value = self.key(item)
+
+        if len(self.blocks) == 0:
+            self.blocks.append([item])
+            self.maxes.append(value)
+            self.length += 1
+            return
+
+        # items after every block's last item go at the end of the last block
+        i = min(bisect_left(self.maxes, value), len(self.blocks) - 1)
+        block = self.blocks[i]
+
+        insort(block, item, key=self.key)
+        self.maxes[i] = self.key(block[-1])
+        self.length += 1
+
+        if len(block) > 2 * block_size:
+            self.blocks[i:i+1] = [block[:block_size], block[block_size:]]
+            self.maxes[i:i+1] = [self.key(block[block_size-1]), self.maxes[i]]
+
+    # does nothing if the item isn't in the list
+    def remove(self, item):
+        value = self.key(item)
+        i = bisect_left(self.maxes, value)
+
+        if i == len(self.blocks):
+            return
+
+        block = self.blocks[i]
+        j = bisect_left(block, value, key=self.key)
+
+        if j == len(block) or block[j] != item:
+            return
+
+        del block[j]
+        self.length -= 1
+
+        if len(block) == 0:
+            del self.blocks[i]
+            del self.maxes[i]
+        else:
+            self.maxes[i] = self.key(block[-1])
+
+    def __iter__(self):
+        for block in self.blocks:
+            yield from block
+
+    # supports single positions and slices (without a step) like a list does, so that it can be used in place of one, e.g. with bisect
+    def __getitem__(self, index):
+        if type(index) is slice:
+            start, stop, step = index.indices(self.length)
+            items = []
+
+            # start and stop are kept relative to the current block
+            for block in self.blocks:
+                if stop <= 0:
+                    break
+
+                if start < len(block):
+                    items += block[start:stop]
+
+                start = max(start - len(block), 0)
+                stop -= len(block)
+
+            return items
+
+        if index < 0:
+            index += self.length
+
+        if not 0 <= index < self.length:
+            raise IndexError("SortedList index out of range")
+
+        for block in self.blocks:
+            if index < len(block):
+                return block[index]
+
+            index -= len(block)